@@ -220,6 +220,17 @@ def health_check():
     return jsonify({"status": "ok", "service": "calendar-server"})
 
 
+def _conditional_json(payload: Any):
+    """Jsonify with an ETag so clients can revalidate instead of re-downloading.
+
+    When the request carries a matching If-None-Match, Flask answers 304
+    with no body and the client reuses its cached parse.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+
 @app.route("/api/events", methods=["GET"])
 def get_events():
     """
@@ -230,7 +241,7 @@ def get_events():
     end_date = request.args.get("endDate")
     
     events = calendar_store.list_events(start_date, end_date)
-    return jsonify(events)
+    return _conditional_json(events)
 
 
 @app.route("/api/events/<event_id>", methods=["GET"])
@@ -246,7 +257,7 @@ def get_event(event_id: str):
 def get_tasks():
     """Return tasks captured by the agent."""
     tasks = calendar_store.list_tasks()
-    return jsonify(tasks)
+    return _conditional_json(tasks)
 
 
 @app.route("/api/events", methods=["POST"])
@@ -277,6 +288,28 @@ def update_event(event_id: str):
         return jsonify({"error": str(e)}), 400
 
 
+@app.route("/api/events/bulk_delete", methods=["POST"])
+def bulk_delete_events():
+    """
+    Delete many events in one request.
+    Body: {"ids": [...]} and/or {"date": "YYYY-MM-DD"} to delete a whole day.
+    """
+    if not request.json:
+        return jsonify({"error": "Request body must be JSON"}), 400
+
+    ids = request.json.get("ids") or []
+    date_filter = request.json.get("date")
+    if date_filter and not ids:
+        ids = [
+            event.get("id")
+            for event in calendar_store.list_events(date_filter, date_filter)
+            if event.get("id")
+        ]
+
+    deleted = sum(1 for event_id in ids if calendar_store.delete_event(event_id))
+    return jsonify({"success": True, "deleted": deleted})
+
+
 @app.route("/api/events/<event_id>", methods=["DELETE"])
 def delete_event(event_id: str):
     """Delete an event."""
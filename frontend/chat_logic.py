@@ -4,11 +4,47 @@ from ai_wrapper import friendly_ai
 
 Message = Dict[str, str]
 
+# Rough chars-per-token estimate for thresholding; exact counts don't matter
+# here, only that very long conversations get bounded before the LLM call.
+_CHARS_PER_TOKEN = 4
+_SUMMARY_MAX_CHARS = 2000
+
+
+def compress_history(
+    history: Sequence[Message] | None,
+    ctx_window: int = 8192,
+    theta: float = 0.8,
+    keep_last: int = 10,
+) -> List[Message]:
+    """Bound the history sent to the LLM for long conversations.
+
+    When the estimated token count exceeds ``theta * ctx_window``, older
+    messages are folded into a single system summary and only the last
+    ``keep_last`` turns are kept verbatim, so LLM latency and cost stay
+    constant regardless of conversation length.
+    """
+    if not history:
+        return []
+    messages = list(history)
+    estimated_tokens = sum(
+        len(m.get("content", "")) // _CHARS_PER_TOKEN for m in messages
+    )
+    if estimated_tokens <= int(ctx_window * theta) or len(messages) <= keep_last:
+        return messages
+
+    older, recent = messages[:-keep_last], messages[-keep_last:]
+    lines = [f"{m.get('role', 'user')}: {m.get('content', '')}" for m in older]
+    summary = "Summary of the earlier conversation:\n" + "\n".join(lines)
+    if len(summary) > _SUMMARY_MAX_CHARS:
+        summary = summary[:_SUMMARY_MAX_CHARS] + "…"
+    return [{"role": "system", "content": summary}] + recent
+
 
 def build_bot_reply(
     user_message: str, history: Sequence[Message] | None = None
 ) -> Tuple[str, Optional[dict]]:
     """Return a conversational reply and an optional calendar action."""
+    history = compress_history(history)
     reply = friendly_ai.generate_reply(user_message, history)
     action = friendly_ai.plan_calendar_action(user_message, history)
     return reply, action
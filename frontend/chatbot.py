@@ -1,1405 +1,1716 @@
-import html
-import logging
-import os
-import re
-import subprocess
-import time
-from collections import defaultdict
-from typing import Any, Dict, List, Optional, Tuple
-
-import sys
-
-from datetime import datetime, date, timedelta
-
-import gradio as gr
-import requests
-from zoneinfo import ZoneInfo
-
-from chat_logic import Message, build_bot_reply, messages_to_history
-from storage import ConversationStore
-
-store = ConversationStore()
-logger = logging.getLogger(__name__)
-CALENDAR_API = os.getenv("VITE_CALENDAR_API", "http://localhost:5050/api")
-_LATEST_CREATED_EVENT: Dict[str, Dict[str, Any]] = {}
-LOCAL_TZ = ZoneInfo("Europe/Amsterdam")
-
-CSS_FILE = os.path.join(os.path.dirname(__file__), "static", "chatbot.css")
-PANEL_CSS = """
-<style>
-.panel-card {
-    background: var(--block-background-fill);
-    border: 1px solid var(--border-color-primary);
-    border-radius: var(--radius-lg);
-    padding: 12px;
-    gap: 10px;
-    margin-bottom: 12px;
-}
-.panel-card:last-of-type {
-    margin-bottom: 0;
-}
-.panel-card h3 {
-    margin: 0;
-    font-size: 1.05rem;
-}
-.schedule-grid {
-    display: flex;
-    flex-direction: column;
-    gap: 6px;
-    max-height: 360px;
-    overflow-y: auto;
-    padding-right: 4px;
-}
-.schedule-row {
-    display: grid;
-    grid-template-columns: 70px 1fr;
-    align-items: center;
-    column-gap: 12px;
-    padding: 6px 8px;
-    border-radius: var(--radius-md);
-    background: var(--background-fill-secondary);
-}
-.schedule-row.has-meeting {
-    background: color-mix(in srgb, var(--secondary-600) 18%, transparent);
-    border-left: 3px solid var(--secondary-500);
-}
-.schedule-time {
-    font-weight: 600;
-    color: var(--body-text-color);
-}
-.schedule-title {
-    color: var(--body-text-color);
-    opacity: 0.85;
-}
-.schedule-empty {
-    color: var(--body-text-color);
-    opacity: 0.4;
-    font-style: italic;
-}
-.schedule-grid::-webkit-scrollbar {
-    width: 0;
-    height: 0;
-}
-.schedule-grid {
-    scrollbar-width: none;
-}
-.tasks-list {
-    list-style: disc inside;
-    padding-left: 0;
-    margin: 0;
-    max-height: 260px;
-    overflow-y: auto;
-    padding-right: 4px;
-}
-.tasks-list li {
-    margin-bottom: 10px;
-    color: var(--body-text-color);
-}
-.tasks-list li:last-of-type {
-    margin-bottom: 0;
-}
-.task-title {
-    font-weight: 600;
-    color: var(--body-text-color);
-}
-.task-desc {
-    font-size: 0.9rem;
-    opacity: 0.75;
-    margin-top: 4px;
-}
-.task-status {
-    padding: 2px 10px;
-    border-radius: 999px;
-    font-size: 0.85rem;
-}
-.status-not-started,
-.status-in-progress,
-.status-blocked {
-    display: none;
-}
-.task-empty {
-    font-style: italic;
-    opacity: 0.6;
-}
-.tasks-list::-webkit-scrollbar {
-    width: 0;
-    height: 0;
-}
-.tasks-list {
-    scrollbar-width: none;
-}
-.sidebar-column {
-    gap: 12px;
-}
-.conversation-card {
-    gap: 10px;
-}
-.sidebar-heading {
-    margin: 0;
-}
-.sidebar-new-btn button {
-    width: 100%;
-}
-.gradio-container .loading,
-.gradio-container .progress-bar,
-.gradio-container .progress-bar-wrap,
-.gradio-container .progress-bars,
-.gradio-container .progress-info,
-.gradio-container .progress-viewer,
-.gradio-container .progress-viewer * ,
-.gradio-container .absolute.w-full.h-full.bg-gradient-to-r.from-gray-50.to-gray-100/80.backdrop-blur {
-    display: none !important;
-    opacity: 0 !important;
-    visibility: hidden !important;
-}
-.gradio-container .loading span {
-    display: none !important;
-}
-
-/* Magic AI Button Styling */
-#magic-ai-button {
-    position: relative;
-    background: linear-gradient(135deg, #0066ff 0%, #00ccff 100%);
-    border: none;
-    border-radius: 50px;
-    padding: 16px 48px;
-    font-size: 18px;
-    font-weight: 600;
-    color: white;
-    text-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);
-    box-shadow:
-        0 4px 15px rgba(0, 102, 255, 0.4),
-        0 0 30px rgba(0, 204, 255, 0.3),
-        inset 0 1px 0 rgba(255, 255, 255, 0.3);
-    cursor: pointer;
-    transition: all 0.3s ease;
-    overflow: hidden;
-    margin: 20px auto;
-    display: block;
-    width: fit-content;
-}
-
-#magic-ai-button::before {
-    content: '';
-    position: absolute;
-    top: -50%;
-    left: -50%;
-    width: 200%;
-    height: 200%;
-    background: linear-gradient(
-        45deg,
-        transparent,
-        rgba(255, 255, 255, 0.1),
-        transparent
-    );
-    transform: rotate(45deg);
-    animation: shimmer 3s infinite;
-}
-
-#magic-ai-button:hover {
-    transform: translateY(-2px);
-    box-shadow:
-        0 6px 25px rgba(0, 102, 255, 0.6),
-        0 0 50px rgba(0, 204, 255, 0.5),
-        inset 0 1px 0 rgba(255, 255, 255, 0.4);
-    background: linear-gradient(135deg, #0077ff 0%, #00ddff 100%);
-}
-
-#magic-ai-button:active {
-    transform: translateY(0px);
-    box-shadow:
-        0 2px 10px rgba(0, 102, 255, 0.5),
-        0 0 20px rgba(0, 204, 255, 0.4),
-        inset 0 1px 0 rgba(255, 255, 255, 0.2);
-}
-
-#magic-ai-button {
-    animation: pulse-glow 2s ease-in-out infinite;
-}
-
-</style>
-"""
-
-
-FREE_TIME_KEYWORDS = {
-    "pool",
-    "swim",
-    "gym",
-    "run",
-    "yoga",
-    "dinner",
-    "lunch",
-    "breakfast",
-    "brunch",
-    "party",
-    "vacation",
-    "holiday",
-    "family",
-    "friends",
-    "hangout",
-    "movie",
-    "concert",
-    "wedding",
-    "birthday",
-    "personal",
-    "relax",
-    "hobby",
-}
-
-_RESCHEDULE_KEYWORDS = {
-    "move",
-    "reschedule",
-    "resched",
-    "shift",
-    "postpone",
-    "delay",
-    "push",
-    "later",
-    "back",
-}
-
-
-def _infer_category(action: dict | None, default: str = "work") -> str:
-    if not action:
-        return default
-
-    raw = (action.get("new_category") or action.get("category") or "").strip().lower()
-    if raw in {"work", "personal"}:
-        return raw
-
-    text_bits = [
-        action.get("title") or "",
-        action.get("description") or "",
-        action.get("new_title") or "",
-        action.get("new_description") or "",
-    ]
-    blob = " ".join(text_bits).lower()
-    if any(keyword in blob for keyword in FREE_TIME_KEYWORDS):
-        return "personal"
-
-    return default or "work"
-
-
-def fetch_calendar_events(_: Optional[str]) -> List[dict]:
-    """Fetch events from the calendar server REST API."""
-    try:
-        response = requests.get(f"{CALENDAR_API}/events", timeout=10)
-        response.raise_for_status()
-        events = response.json()
-        if isinstance(events, list):
-            return events
-    except Exception as exc:
-        print(f"[chatbot] Failed to load calendar events: {exc}")
-    return []
-
-
-def get_todays_events(conversation_id: Optional[str]) -> List[dict]:
-    """Filter calendar events for the current day."""
-    events = fetch_calendar_events(conversation_id)
-    today_str = date.today().isoformat()
-    todays_events = [
-        event for event in events if event.get("startDate") == today_str
-    ]
-    return todays_events
-
-
-def fetch_task_list(_: Optional[str]) -> List[dict]:
-    """Fetch tasks captured by the agent from the calendar server REST API."""
-    try:
-        response = requests.get(f"{CALENDAR_API}/tasks", timeout=10)
-        response.raise_for_status()
-        payload = response.json()
-    except Exception as exc:
-        print(f"[chatbot] Failed to load tasks: {exc}")
-        return []
-
-    if not isinstance(payload, list):
-        return []
-
-    tasks: List[dict] = []
-    for item in payload:
-        tasks.append(
-            {
-                "title": item.get("title") or "Untitled task",
-                "description": item.get("description") or "",
-                "dueDate": item.get("date_of_meeting"),
-                "dueTime": item.get("start_time"),
-                "completed": item.get("meeting_completed", False),
-            }
-        )
-    return tasks
-
-
-def _add_one_hour(start_time: str) -> str:
-    try:
-        base = datetime.strptime(start_time, "%H:%M")
-    except ValueError:
-        base = datetime.strptime("09:00", "%H:%M")
-    end = base + timedelta(hours=1)
-    return end.strftime("%H:%M")
-
-
-def _normalise_time(value: str | None) -> str | None:
-    if not value:
-        return None
-    value = value.strip()
-    try:
-        datetime.strptime(value, "%H:%M")
-        return value
-    except ValueError:
-        return None
-
-
-def _coerce_time_string(value: str | None) -> str:
-    if not value:
-        return ""
-    value = value.strip()
-    if not value:
-        return ""
-
-    am_pm_match = re.match(
-        r"^(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)$",
-        value,
-        re.IGNORECASE,
-    )
-    if am_pm_match:
-        hour = int(am_pm_match.group("hour"))
-        minute = int(am_pm_match.group("minute") or "00")
-        meridiem = am_pm_match.group("meridiem").lower()
-        hour = hour % 12
-        if meridiem == "pm":
-            hour += 12
-        return f"{hour:02d}:{minute:02d}"
-
-    normal = _normalise_time(value)
-    if normal:
-        return normal
-
-    if len(value) >= 5 and value[2] == ":":
-        candidate = value[:5]
-        normal = _normalise_time(candidate)
-        if normal:
-            return normal
-
-    if value.isdigit():
-        if len(value) <= 2:
-            candidate = value.zfill(2) + ":00"
-            normal = _normalise_time(candidate)
-            if normal:
-                return normal
-
-    return value
-
-
-_NUMBER_WORDS = {
-    "zero": 0,
-    "a": 1,
-    "an": 1,
-    "one": 1,
-    "two": 2,
-    "three": 3,
-    "four": 4,
-    "five": 5,
-    "six": 6,
-    "seven": 7,
-    "eight": 8,
-    "nine": 9,
-    "ten": 10,
-    "eleven": 11,
-    "twelve": 12,
-    "half": 0.5,
-    "quarter": 0.25,
-}
-
-_NEGATIVE_KEYWORDS = {"earlier", "before", "forward", "sooner", "ahead"}
-
-_BULK_DELETE_KEYWORDS = {
-    "all",
-    "every",
-    "entire",
-    "remove all",
-    "delete all",
-    "clear all",
-    "wipe",
-}
-
-
-def _parse_time_offset(text: Optional[str]) -> Optional[int]:
-    if not text:
-        return None
-    lowered = text.lower()
-
-    in_pattern = re.compile(
-        r"in\s+(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>hours?|hrs?|minutes?|mins?)",
-        re.IGNORECASE,
-    )
-    numeric_pattern = re.compile(
-        r"(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>hours?|hrs?|minutes?|mins?)(?:\s*(?P<direction>later|after|earlier|before|forward|sooner|back))?",
-        re.IGNORECASE,
-    )
-    word_pattern = re.compile(
-        r"(?P<amount_word>zero|a|an|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|half|quarter)\s*(?P<unit>hours?|hrs?|minutes?|mins?)(?:\s*(?P<direction>later|after|earlier|before|forward|sooner|back))?",
-        re.IGNORECASE,
-    )
-
-    match = in_pattern.search(lowered)
-    if match:
-        amount = float(match.group("amount"))
-        unit = match.group("unit").lower()
-        direction = "later"
-    else:
-        match = numeric_pattern.search(lowered)
-        if match:
-            amount = float(match.group("amount"))
-            unit = match.group("unit").lower()
-            direction = (match.group("direction") or "later").lower()
-        else:
-            match = word_pattern.search(lowered)
-            if not match:
-                return None
-            amount_word = match.group("amount_word").lower()
-            amount = _NUMBER_WORDS.get(amount_word)
-            if amount is None:
-                return None
-            unit = match.group("unit").lower()
-            direction = (match.group("direction") or "later").lower()
-
-    if unit.startswith("hour") or unit.startswith("hr"):
-        minutes = int(amount * 60)
-    else:
-        minutes = int(amount * 1)
-
-    if direction in _NEGATIVE_KEYWORDS:
-        minutes *= -1
-    return minutes
-
-
-def _parse_time(value: Optional[str]) -> Optional[datetime]:
-    if not value:
-        return None
-    try:
-        return datetime.strptime(value, "%H:%M")
-    except ValueError:
-        return None
-
-
-def _add_minutes_to_time(start_time: Optional[str], minutes: int, default: str = "09:00") -> str:
-    base = _parse_time(start_time) or _parse_time(default)
-    if not base:
-        base = datetime.strptime("09:00", "%H:%M")
-    total_minutes = base.hour * 60 + base.minute + minutes
-    total_minutes = max(0, min(total_minutes, 23 * 60 + 59))
-    hour = total_minutes // 60
-    minute = total_minutes % 60
-    return f"{hour:02d}:{minute:02d}"
-
-
-def _compute_duration_minutes(start_time: Optional[str], end_time: Optional[str]) -> Optional[int]:
-    start_dt = _parse_time(start_time)
-    end_dt = _parse_time(end_time)
-    if not start_dt or not end_dt:
-        return None
-    delta = end_dt - start_dt
-    minutes = int(delta.total_seconds() // 60)
-    return minutes if minutes > 0 else None
-
-
-def apply_calendar_action(
-    action: Optional[dict],
-    user_message: Optional[str] = None,
-    conversation_id: Optional[str] = None,
-) -> Optional[str]:
-    if not action or action.get("action") in (None, "none"):
-        return None
-
-    action_type = action.get("action")
-
-    if action_type == "create":
-        date_str = (action.get("date") or action.get("date_of_meeting") or "").strip()
-        offset_minutes = _parse_time_offset(user_message)
-        if offset_minutes is not None:
-            now_local = datetime.now(LOCAL_TZ)
-            target_dt = now_local + timedelta(minutes=offset_minutes)
-            date_str = target_dt.date().isoformat()
-            action["start_time"] = target_dt.strftime("%H:%M")
-            if not (action.get("end_time") or action.get("endTime")):
-                action["end_time"] = (target_dt + timedelta(hours=1)).strftime("%H:%M")
-
-        if not date_str:
-            events = fetch_calendar_events(None)
-            suggestions = _suggest_free_days(events)
-            if suggestions:
-                lines = [
-                    "I need a date to schedule that meeting. Here are some upcoming days with availability:",
-                ]
-                for day_str, count in suggestions:
-                    availability = "free" if count == 0 else _format_count(count, "meeting", "meetings")
-                    lines.append(f"- {day_str}: {availability}")
-                lines.append("Let me know which day works best for you.")
-                return "\n".join(lines)
-            return "⚠️ I couldn’t find an open day yet. Please tell me which date you prefer."
-
-        start_time = _coerce_time_string(action.get("start_time") or action.get("startTime"))
-        start_time = _normalise_time(start_time)
-        end_time = _normalise_time(action.get("end_time") or action.get("endTime"))
-
-        if not start_time:
-            events = fetch_calendar_events(None)
-            free_slots = _find_free_slots_for_date(events, date_str, 60)
-            if free_slots:
-                slots_text = ", ".join(free_slots)
-                return f"I need a start time for {date_str}. Free slots include {slots_text}. Which one should I book?"
-            return f"⚠️ {date_str} is fully booked. Please choose another time or day."
-
-        if not end_time:
-            end_time = _add_one_hour(start_time)
-
-        title = (action.get("title") or "Meeting").strip() or "Meeting"
-        description = (action.get("description") or "").strip()
-
-        if start_time and _looks_like_reschedule(action, user_message):
-            existing_events = fetch_calendar_events(None)
-            _maybe_delete_reschedule_conflict(
-                existing_events,
-                title,
-                date_str,
-                start_time,
-                action,
-                user_message,
-                conversation_id,
-            )
-
-        payload = {
-            "title": title,
-            "description": description,
-            "startDate": date_str,
-            "endDate": date_str,
-            "startTime": start_time,
-            "endTime": end_time,
-            "category": action.get("category") or "work",
-        }
-
-        try:
-            resp = requests.post(f"{CALENDAR_API}/events", json=payload, timeout=10)
-            resp.raise_for_status()
-            created_event = resp.json()
-            if conversation_id and isinstance(created_event, dict):
-                _LATEST_CREATED_EVENT[conversation_id] = created_event
-        except Exception as exc:
-            logger.warning("Failed to create calendar event: %s", exc)
-            return "⚠️ I tried to add that meeting but something went wrong."
-
-        logger.info("Created calendar event: %s", payload)
-        return f"✅ Scheduled “{title}” on {date_str} at {start_time}."
-
-    if action_type in {"delete", "reschedule"}:
-        try:
-            events = fetch_calendar_events(None)
-        except Exception:
-            events = []
-
-        target_event: Optional[dict] = None
-        candidate_id = action.get("event_id") or action.get("id")
-        title_hint = (action.get("title") or "").strip().lower()
-        date_hint = (action.get("date") or action.get("date_of_meeting") or "").strip()
-        raw_time_hint = (action.get("start_time") or action.get("startTime") or "").strip()
-        time_hint = _coerce_time_string(raw_time_hint)
-
-        if action_type == "delete" and _wants_bulk_delete(action, user_message):
-            bulk_targets = []
-            if date_hint:
-                bulk_targets = [
-                    event
-                    for event in events
-                    if (event.get("startDate") or event.get("date_of_meeting") or "") == date_hint
-                ]
-            else:
-                bulk_targets = events[:]
-
-            if bulk_targets:
-                deleted_count = 0
-                for event in bulk_targets:
-                    eid = event.get("id")
-                    if not eid:
-                        continue
-                    try:
-                        resp = requests.delete(f"{CALENDAR_API}/events/{eid}", timeout=10)
-                        if resp.status_code in {200, 204, 404}:
-                            deleted_count += 1
-                            if conversation_id and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") == eid:
-                                _LATEST_CREATED_EVENT.pop(conversation_id, None)
-                        else:
-                            resp.raise_for_status()
-                    except Exception as exc:
-                        logger.warning("Failed to delete calendar event (bulk): %s", exc)
-                        continue
-
-                if deleted_count:
-                    descriptor = date_hint or "your calendar"
-                    return f"🗑️ Removed {_format_count(deleted_count, 'meeting', 'meetings')} from {descriptor}."
-                return "⚠️ I tried to remove those meetings but something went wrong."
-
-        if candidate_id and not target_event:
-            target_event = next((ev for ev in events if ev.get("id") == candidate_id), None)
-
-        if not candidate_id:
-            for event in events:
-                event_title = (event.get("title") or "").lower()
-                event_date = event.get("startDate") or event.get("date_of_meeting") or ""
-                event_time = event.get("startTime") or event.get("start_time") or ""
-
-                if title_hint and title_hint not in event_title:
-                    continue
-                if date_hint and date_hint != event_date:
-                    continue
-                if time_hint and time_hint != event_time:
-                    continue
-                candidate_id = event.get("id")
-                if candidate_id:
-                    break
-
-        if not candidate_id:
-            logger.debug("Calendar delete: fell back to events search, candidate=%s", candidate_id)
-
-        if not candidate_id:
-            logger.debug("Calendar delete/reschedule ignored: no matching event for %s", action)
-            if action_type == "delete" and events:
-                return _build_delete_suggestion(events)
-            return "⚠️ I couldn’t find a matching meeting to delete." if action_type == "delete" else "⚠️ I couldn’t find the meeting to reschedule."
-
-        if not target_event and candidate_id:
-            target_event = next((ev for ev in events if ev.get("id") == candidate_id), None)
-
-        latest_request = (
-            action_type == "delete"
-            and conversation_id
-            and conversation_id in _LATEST_CREATED_EVENT
-            and user_message
-            and any(
-                keyword in user_message.lower()
-                for keyword in ["latest", "last", "recent", "just created"]
-            )
-        )
-        if latest_request and not candidate_id:
-            candidate_id = _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id")
-
-        try:
-            resp = requests.delete(f"{CALENDAR_API}/events/{candidate_id}", timeout=10)
-            if resp.status_code == 404:
-                return "⚠️ I couldn’t find a matching meeting to delete."
-            resp.raise_for_status()
-        except Exception as exc:
-            logger.warning("Failed to delete calendar event: %s", exc)
-            return "⚠️ I tried to remove that meeting but something went wrong."
-
-        logger.info("Deleted calendar event id=%s", candidate_id)
-        if conversation_id and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") == candidate_id:
-            _LATEST_CREATED_EVENT.pop(conversation_id, None)
-
-        if action_type == "delete":
-            return "🗑️ Removed the meeting from your calendar."
-
-        # Reschedule branch
-        if not target_event:
-            logger.debug("Reschedule: deleted event but missing cached details, cannot recreate")
-            return "⚠️ Removed the original meeting but couldn’t create the new one."  # Unlikely
-
-        existing_title = target_event.get("title") or "Meeting"
-        existing_description = target_event.get("description") or ""
-        existing_date = target_event.get("startDate") or target_event.get("date_of_meeting") or ""
-        existing_start = (
-            target_event.get("startTime")
-            or target_event.get("start_time")
-            or target_event.get("time")
-            or "09:00"
-        )
-        existing_end = target_event.get("endTime") or target_event.get("end_time") or ""
-        existing_category = target_event.get("category") or "work"
-        existing_duration = _compute_duration_minutes(existing_start, existing_end)
-
-        new_title = (action.get("new_title") or action.get("title") or existing_title).strip() or existing_title
-        new_description = (action.get("new_description") or action.get("description") or existing_description).strip()
-        new_date = (action.get("new_date") or action.get("date") or action.get("date_of_meeting") or existing_date).strip() or existing_date
-
-        new_start_candidate = _coerce_time_string(
-            action.get("new_start_time") or action.get("start_time") or action.get("startTime")
-        )
-        new_start = _normalise_time(new_start_candidate)
-
-        offset_minutes = _parse_time_offset(user_message)
-        if offset_minutes is not None:
-            base_for_offset = existing_start or new_start or "09:00"
-            new_start = _add_minutes_to_time(base_for_offset, offset_minutes)
-
-        if not new_start:
-            new_start = existing_start or "09:00"
-
-        new_end_candidate = _coerce_time_string(
-            action.get("new_end_time") or action.get("end_time") or action.get("endTime")
-        )
-        new_end = _normalise_time(new_end_candidate)
-
-        if offset_minutes is not None and existing_duration is not None:
-            new_end = _add_minutes_to_time(new_start, existing_duration)
-
-        if not new_end:
-            if existing_duration is not None:
-                new_end = _add_minutes_to_time(new_start, existing_duration)
-            else:
-                new_end = _add_one_hour(new_start)
-
-        category = _infer_category({**(action or {}), **target_event}, default=existing_category or "work")
-
-        payload = {
-            "title": new_title,
-            "description": new_description,
-            "startDate": new_date,
-            "endDate": new_date,
-            "startTime": new_start,
-            "endTime": new_end,
-            "category": category,
-            "time": new_start,
-        }
-        payload["category"] = _infer_category({**(action or {}), **payload}, default=category)
-
-        try:
-            resp = requests.post(f"{CALENDAR_API}/events", json=payload, timeout=10)
-            resp.raise_for_status()
-            created_event = resp.json()
-            if conversation_id and isinstance(created_event, dict):
-                _LATEST_CREATED_EVENT[conversation_id] = created_event
-        except Exception as exc:
-            logger.warning("Failed to create rescheduled event: %s", exc)
-            return "⚠️ I removed the original meeting but couldn’t create the new one."
-
-        logger.info("Rescheduled calendar event: %s -> %s", target_event.get("id"), payload)
-        return f"🔁 Rescheduled “{new_title}” for {new_date} at {new_start}."
-
-    return None
-
-
-def render_schedule(events: List[dict]) -> str:
-    hours = [f"{hour:02d}:00" for hour in range(8, 23)]
-    slots: dict[str, List[str]] = {hour: [] for hour in hours}
-    all_day: List[str] = []
-
-    for event in events:
-        title = html.escape(event.get("title") or "Untitled event")
-        start_time = event.get("startTime")
-        end_time = event.get("endTime")
-        time_range = ""
-        if start_time and end_time:
-            time_range = f"{start_time}–{end_time}"
-        elif start_time:
-            time_range = start_time
-
-        description = html.escape(event.get("description") or "")
-        meta = f"{title}"
-        if time_range:
-            meta += f" · {time_range}"
-        if description:
-            meta += f"<br><small>{description}</small>"
-
-        if start_time:
-            hour_slot = f"{start_time[:2]}:00"
-            slots.setdefault(hour_slot, []).append(meta)
-        else:
-            all_day.append(meta)
-
-    rows: List[str] = []
-    if all_day:
-        rows.append(
-            '<div class="schedule-row has-meeting">'
-            '<div class="schedule-time">All Day</div>'
-            f'<div class="schedule-title">{"<br>".join(all_day)}</div>'
-            "</div>"
-        )
-
-    for hour in hours:
-        meetings = slots.get(hour, [])
-        is_meeting = bool(meetings)
-        content = "<br>".join(meetings) if meetings else '<span class="schedule-empty">– free –</span>'
-        row_class = "schedule-row has-meeting" if is_meeting else "schedule-row"
-        rows.append(
-            f'<div class="{row_class}"><div class="schedule-time">{hour}</div>'
-            f'<div class="schedule-title">{content}</div></div>'
-        )
-
-    return f'<div class="schedule-grid">{"".join(rows)}</div>'
-
-
-def render_tasks(tasks: List[dict]) -> str:
-    if not tasks:
-        return '<ul class="tasks-list"><li class="task-empty">No tasks yet.</li></ul>'
-
-    items: List[str] = []
-    for task in tasks:
-        title = html.escape(task.get("title", "Untitled task"))
-        description_raw = (task.get("description") or "").strip()
-        if description_raw and len(description_raw) > 140:
-            description_raw = description_raw[:137].rstrip() + "..."
-        description = html.escape(description_raw)
-        desc_html = f'<div class="task-desc">{description}</div>' if description else ""
-        items.append(f"<li><span class=\"task-title\">{title}</span>{desc_html}</li>")
-    return f'<ul class="tasks-list">{"".join(items)}</ul>'
-
-
-def run_agent_background(conversation_id: Optional[str]) -> Tuple[str, str]:
-    """
-    Run the backend agent.py script and wait for scheduler to process results.
-    This ensures the UI shows accurate data after completion.
-    """
-    try:
-        # Get the project root directory
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        agent_path = os.path.join(project_root, "backend", "agent.py")
-        
-        print(f"[chatbot] Starting AI agent: {agent_path}")
-        
-        # Get initial counts to compare later
-        initial_events = fetch_calendar_events(conversation_id)
-        initial_tasks = fetch_task_list(conversation_id)
-        initial_event_count = len(initial_events)
-        initial_task_count = len(initial_tasks)
-        
-        # Run the agent script synchronously
-        result = subprocess.run(
-            [sys.executable, agent_path],
-            cwd=project_root,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout
-        )
-        
-        if result.returncode == 0:
-            print(f"[chatbot] AI agent completed successfully")
-            print(f"[chatbot] Agent output:\n{result.stdout}")
-            
-            # Wait for scheduler to process the results
-            # Poll the database every 2 seconds for up to 2 minutes
-            max_wait_time = 120  # 2 minutes
-            poll_interval = 2  # seconds
-            elapsed = 0
-            
-            print(f"[chatbot] Waiting for scheduler to process results...")
-            
-            while elapsed < max_wait_time:
-                time.sleep(poll_interval)
-                elapsed += poll_interval
-                
-                # Check if new events or tasks have appeared
-                current_events = fetch_calendar_events(conversation_id)
-                current_tasks = fetch_task_list(conversation_id)
-                current_event_count = len(current_events)
-                current_task_count = len(current_tasks)
-                
-                # If we have new data, the scheduler has processed
-                if current_event_count > initial_event_count or current_task_count > initial_task_count:
-                    print(f"[chatbot] Scheduler processed results after {elapsed}s")
-                    print(f"[chatbot] Events: {initial_event_count} -> {current_event_count}")
-                    print(f"[chatbot] Tasks: {initial_task_count} -> {current_task_count}")
-                    break
-                
-                # Show progress
-                if elapsed % 10 == 0:
-                    print(f"[chatbot] Still waiting... ({elapsed}s elapsed)")
-            
-            # Fetch final data after waiting
-            final_events = fetch_calendar_events(conversation_id)
-            final_tasks = fetch_task_list(conversation_id)
-            meetings_count = len(final_events)
-            tasks_count = len(final_tasks)
-            
-            # Calculate what was added
-            new_meetings = meetings_count - initial_event_count
-            new_tasks = tasks_count - initial_task_count
-            
-            # Render the updated panels
-            schedule_html = render_schedule(get_todays_events(conversation_id))
-            tasks_html = render_tasks(final_tasks)
-            
-            # Add success message with actual counts
-            if new_meetings > 0 or new_tasks > 0:
-                success_msg = f"""
-                <div style="padding: 12px; margin-bottom: 12px; background: linear-gradient(135deg, #00ff8822 0%, #00ff4422 100%); border-radius: 8px; border: 2px solid #00ff8844;">
-                    <div style="font-weight: 600; color: #00aa44; margin-bottom: 4px;">✓ AI Agent Completed</div>
-                    <div style="font-size: 0.9em; color: #666;">
-                        Added {new_meetings} new meeting(s) and {new_tasks} new task(s)
-                        <br>Total: {meetings_count} meeting(s) and {tasks_count} task(s)
-                    </div>
-                </div>
-                {schedule_html}
-                """
-            else:
-                success_msg = f"""
-                <div style="padding: 12px; margin-bottom: 12px; background: linear-gradient(135deg, #ffaa0022 0%, #ff880022 100%); border-radius: 8px; border: 2px solid #ffaa0044;">
-                    <div style="font-weight: 600; color: #cc6600; margin-bottom: 4px;">✓ AI Agent Completed</div>
-                    <div style="font-size: 0.9em; color: #666;">
-                        No new meetings or tasks found
-                        <br>Waited {elapsed}s for scheduler processing
-                    </div>
-                </div>
-                {schedule_html}
-                """
-            
-            return success_msg, tasks_html
-            
-        else:
-            print(f"[chatbot] AI agent failed with code {result.returncode}")
-            print(f"[chatbot] Error output:\n{result.stderr}")
-            
-            error_msg = """
-            <div style="padding: 12px; background: linear-gradient(135deg, #ff444422 0%, #ff000022 100%); border-radius: 8px; border: 2px solid #ff444444;">
-                <div style="font-weight: 600; color: #cc0000; margin-bottom: 4px;">✗ AI Agent Failed</div>
-                <div style="font-size: 0.9em; color: #666;">Check terminal logs for details</div>
-            </div>
-            """
-            
-            schedule_html = render_schedule(get_todays_events(conversation_id))
-            tasks_html = render_tasks(fetch_task_list(conversation_id))
-            
-            return error_msg + schedule_html, tasks_html
-            
-    except subprocess.TimeoutExpired:
-        print(f"[chatbot] AI agent timed out after 5 minutes")
-        
-        timeout_msg = """
-        <div style="padding: 12px; background: linear-gradient(135deg, #ffaa0022 0%, #ff880022 100%); border-radius: 8px; border: 2px solid #ffaa0044;">
-            <div style="font-weight: 600; color: #cc6600; margin-bottom: 4px;">⏱ AI Agent Timeout</div>
-            <div style="font-size: 0.9em; color: #666;">Processing took longer than 5 minutes</div>
-        </div>
-        """
-        
-        schedule_html = render_schedule(get_todays_events(conversation_id))
-        tasks_html = render_tasks(fetch_task_list(conversation_id))
-        
-        return timeout_msg + schedule_html, tasks_html
-        
-    except Exception as exc:
-        print(f"[chatbot] Failed to run AI agent: {exc}")
-        
-        error_msg = f"""
-        <div style="padding: 12px; background: linear-gradient(135deg, #ff444422 0%, #ff000022 100%); border-radius: 8px; border: 2px solid #ff444444;">
-            <div style="font-weight: 600; color: #cc0000; margin-bottom: 4px;">✗ Error Running Agent</div>
-            <div style="font-size: 0.9em; color: #666;">{html.escape(str(exc))}</div>
-        </div>
-        """
-        
-        schedule_html = render_schedule(get_todays_events(conversation_id))
-        tasks_html = render_tasks(fetch_task_list(conversation_id))
-        
-        return error_msg + schedule_html, tasks_html
-
-
-def handle_user_message(
-    message: str,
-    history: List[Message],
-    conversation_id: Optional[str],
-) -> Tuple[List[Message], str, str, str, str]:
-    history = history or []
-    cleaned = message.strip()
-
-    conversation_id = conversation_id or store.default_conversation_id()
-
-    if not cleaned:
-        schedule_html = render_schedule(get_todays_events(conversation_id))
-        tasks_html = render_tasks(fetch_task_list(conversation_id))
-        return history, "", conversation_id, schedule_html, tasks_html
-
-    store.append_message(conversation_id, "user", cleaned)
-    bot_reply, calendar_action = build_bot_reply(cleaned, history)
-    action_feedback = apply_calendar_action(calendar_action, cleaned, conversation_id)
-    if action_feedback:
-        bot_reply = f"{bot_reply}\n\n{action_feedback}"
-    store.append_message(conversation_id, "assistant", bot_reply)
-
-    messages = store.fetch_messages(conversation_id)
-    updated_history = messages_to_history(messages)
-    schedule_html = render_schedule(get_todays_events(conversation_id))
-    tasks_html = render_tasks(fetch_task_list(conversation_id))
-    return updated_history, "", conversation_id, schedule_html, tasks_html
-
-
-def initialize_interface(reset: bool = False) -> Tuple[List[Message], str, str, str, str]:
-    conversation_id = store.default_conversation_id()
-    if reset:
-        store.reset_conversation(conversation_id)
-        _LATEST_CREATED_EVENT.pop(conversation_id, None)
-    messages = store.fetch_messages(conversation_id)
-
-    if not messages:
-        welcome_text = (
-            "Hi! I’m your personal assistant. I can review your calendar, find meetings, "
-            "and help you schedule or update events. Just let me know what you need."
-        )
-        store.append_message(conversation_id, "assistant", welcome_text)
-        messages = store.fetch_messages(conversation_id)
-
-    history = messages_to_history(messages)
-    schedule_html = render_schedule(get_todays_events(conversation_id))
-    tasks_html = render_tasks(fetch_task_list(conversation_id))
-    return history, "", conversation_id, schedule_html, tasks_html
-
-
-def start_new_conversation() -> Tuple[List[Message], str, str, str, str]:
-    return initialize_interface(reset=True)
-
-
-def clear_current_conversation(
-    conversation_id: Optional[str],
-) -> Tuple[List[Message], str, str, str, str]:
-    return initialize_interface(reset=True)
-
-
-def load_conversation(
-    conversation_id: Optional[str],
-) -> Tuple[List[Message], str, str, str, str]:
-    return initialize_interface()
-
-
-def _wants_bulk_delete(action: Optional[dict], user_message: Optional[str]) -> bool:
-    texts = []
-    if user_message:
-        texts.append(user_message.lower())
-    if action:
-        for key in ("title", "description", "new_title", "new_description"):
-            value = action.get(key)
-            if value:
-                texts.append(str(value).lower())
-    combined = " ".join(texts)
-    return any(keyword in combined for keyword in _BULK_DELETE_KEYWORDS)
-
-
-def _format_count(n: int, singular: str, plural: str) -> str:
-    return f"{n} {singular if n == 1 else plural}"
-
-
-def _format_event_option(event: dict) -> str:
-    title = event.get("title") or "Untitled meeting"
-    date_part = event.get("startDate") or event.get("date_of_meeting") or ""
-    time_part = event.get("startTime") or event.get("start_time") or ""
-    descriptor = " ".join(value for value in [date_part, time_part] if value)
-    return f"{title} ({descriptor})" if descriptor else title
-
-
-def _build_delete_suggestion(events: List[dict]) -> str:
-    if not events:
-        return "⚠️ I didn’t find any meetings to remove."
-    sorted_events = sorted(
-        events,
-        key=lambda ev: (
-            ev.get("startDate") or ev.get("date_of_meeting") or "",
-            ev.get("startTime") or ev.get("start_time") or "",
-        ),
-    )
-    top_events = sorted_events[:5]
-    lines = ["I’m not sure which meeting to delete. Here are some options:"]
-    for index, event in enumerate(top_events, start=1):
-        lines.append(f"{index}. {_format_event_option(event)}")
-    lines.append("Let me know the exact title, time, or date of the one you want removed.")
-    return "\n".join(lines)
-
-
-def _time_to_minutes(value: Optional[str]) -> Optional[int]:
-    normalised = _normalise_time(value)
-    if not normalised:
-        return None
-    hours, minutes = map(int, normalised.split(":"))
-    return hours * 60 + minutes
-
-
-def _find_free_slots_for_date(events: List[dict], date_str: str, duration_minutes: int = 60) -> List[str]:
-    day_events: List[Tuple[int, int]] = []
-    for event in events:
-        event_date = event.get("startDate") or event.get("date_of_meeting") or ""
-        if event_date != date_str:
-            continue
-        start_minutes = _time_to_minutes(event.get("startTime") or event.get("start_time") or event.get("time"))
-        if start_minutes is None:
-            continue
-        end_minutes = _time_to_minutes(event.get("endTime") or event.get("end_time"))
-        if end_minutes is None:
-            end_minutes = start_minutes + duration_minutes
-        if end_minutes <= start_minutes:
-            end_minutes = start_minutes + duration_minutes
-        day_events.append((start_minutes, end_minutes))
-    day_events.sort()
-
-    suggestions: List[str] = []
-    work_start = 9 * 60
-    work_end = 18 * 60
-    for start_minutes in range(work_start, work_end - duration_minutes + 1, 30):
-        end_minutes = start_minutes + duration_minutes
-        overlap = any(not (end_minutes <= ev_start or start_minutes >= ev_end) for ev_start, ev_end in day_events)
-        if not overlap:
-            suggestions.append(f"{start_minutes // 60:02d}:{start_minutes % 60:02d}")
-        if len(suggestions) >= 5:
-            break
-    return suggestions
-
-
-def _suggest_free_days(events: List[dict], lookahead: int = 7) -> List[Tuple[str, int]]:
-    events_by_date: defaultdict[str, int] = defaultdict(int)
-    for event in events:
-        event_date = event.get("startDate") or event.get("date_of_meeting") or ""
-        if event_date:
-            events_by_date[event_date] += 1
-
-    today = date.today()
-    candidates: List[Tuple[str, int]] = []
-    for offset in range(lookahead):
-        target = today + timedelta(days=offset + 1)
-        day_str = target.isoformat()
-        candidates.append((day_str, events_by_date.get(day_str, 0)))
-
-    free_days = [item for item in candidates if item[1] == 0]
-    if free_days:
-        return free_days[:5]
-
-    return sorted(candidates, key=lambda item: item[1])[:5]
-
-
-def _looks_like_reschedule(action: Optional[dict], user_message: Optional[str]) -> bool:
-    texts: List[str] = []
-    if user_message:
-        texts.append(user_message.lower())
-    if action:
-        for key in (
-            "description",
-            "title",
-            "new_description",
-            "new_title",
-            "meta",
-        ):
-            value = action.get(key)
-            if isinstance(value, str):
-                texts.append(value.lower())
-    combined = " ".join(texts)
-    return any(keyword in combined for keyword in _RESCHEDULE_KEYWORDS)
-
-
-def _extract_time_candidates(text: Optional[str]) -> List[str]:
-    if not text:
-        return []
-    pattern = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b", re.IGNORECASE)
-    candidates: List[str] = []
-    for match in pattern.finditer(text):
-        hour = int(match.group(1))
-        minute = int(match.group(2) or "00")
-        meridiem = match.group(3).lower()
-        if hour == 12:
-            hour = 0
-        if meridiem == "pm":
-            hour += 12
-        candidates.append(f"{hour:02d}:{minute:02d}")
-    # also consider explicit HH:MM without am/pm
-    explicit_pattern = re.compile(r"\b(\d{1,2}):(\d{2})\b")
-    for match in explicit_pattern.finditer(text):
-        hour = int(match.group(1))
-        minute = int(match.group(2))
-        if 0 <= hour < 24:
-            candidates.append(f"{hour:02d}:{minute:02d}")
-    return candidates
-
-
-def _delete_calendar_event(event_id: Optional[str], conversation_id: Optional[str]) -> bool:
-    if not event_id:
-        return False
-    try:
-        resp = requests.delete(f"{CALENDAR_API}/events/{event_id}", timeout=10)
-        if resp.status_code == 404:
-            return False
-        resp.raise_for_status()
-    except Exception as exc:
-        logger.warning("Failed to delete calendar event during reschedule heuristic: %s", exc)
-        return False
-
-    logger.info("Deleted calendar event id=%s for reschedule", event_id)
-    if conversation_id and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") == event_id:
-        _LATEST_CREATED_EVENT.pop(conversation_id, None)
-    return True
-
-
-def _maybe_delete_reschedule_conflict(
-    events: List[dict],
-    title: str,
-    date_str: str,
-    new_start: str,
-    action: Optional[dict],
-    user_message: Optional[str],
-    conversation_id: Optional[str],
-) -> None:
-    if not events:
-        return
-
-    original_times: List[str] = []
-    original_times.extend(_extract_time_candidates(user_message))
-    if action:
-        for key in (
-            "original_start_time",
-            "previous_start_time",
-            "old_start_time",
-            "prior_start_time",
-        ):
-            original_times.append(_coerce_time_string(action.get(key)))
-        original_times.extend(_extract_time_candidates(action.get("description")))
-
-    original_set = {time for time in original_times if time}
-    target_title = title.strip().lower()
-    fallback: Optional[str] = None
-
-    for event in events:
-        event_id = event.get("id")
-        if not event_id:
-            continue
-        event_title = (event.get("title") or "").strip().lower()
-        if target_title and event_title and event_title != target_title:
-            continue
-        event_date = event.get("startDate") or event.get("date_of_meeting") or ""
-        if date_str and event_date != date_str:
-            continue
-        event_start = _coerce_time_string(
-            event.get("startTime") or event.get("start_time") or event.get("time")
-        )
-        if not event_start or event_start == new_start:
-            continue
-        if original_set and event_start in original_set:
-            if _delete_calendar_event(event_id, conversation_id):
-                return
-        if not fallback:
-            fallback = event_id
-
-    if fallback:
-        _delete_calendar_event(fallback, conversation_id)
-
-
-def build_app() -> gr.Blocks:
-    theme = gr.themes.Soft(primary_hue="blue", secondary_hue="slate", radius_size="lg")
-
-    with gr.Blocks(theme=theme, css_paths=[CSS_FILE]) as demo:
-        gr.HTML(PANEL_CSS)
-        conversation_state = gr.State()
-
-        # Tab system for Chat and Calendar views
-        with gr.Tabs() as tabs:
-            # Chat Tab
-            with gr.TabItem("Chat Assistant", id="chat_tab"):
-                with gr.Row(equal_height=True):
-                    with gr.Column(scale=1, min_width=240, elem_classes=["sidebar-column"]):
-                        gr.HTML("&nbsp;")
-
-                    with gr.Column(scale=4):
-                        chatbot = gr.Chatbot(
-                            label="Chat",
-                            height="80vh",
-                            type="messages",
-                        )
-
-                        with gr.Row():
-                            message = gr.Textbox(
-                                show_label=False,
-                                placeholder="Send a message…",
-                                autofocus=True,
-                                lines=1,
-                                max_lines=3,
-                                scale=8,
-                            )
-                            clear_button = gr.Button("Clear", size="sm", variant="secondary", scale=1, min_width=60)
-                            send = gr.Button("➤", size="sm", scale=1, min_width=50)
-
-                    with gr.Column(scale=2, min_width=260):
-                        initial_schedule = render_schedule(get_todays_events(None))
-                        initial_tasks = render_tasks(fetch_task_list(None))
-                        with gr.Column(elem_classes=["panel-card"]):
-                            gr.Markdown("### Today's Calendar")
-                            schedule_panel = gr.HTML(initial_schedule)
-                        with gr.Column(elem_classes=["panel-card"]):
-                            gr.Markdown("### Tasks")
-                            tasks_panel = gr.HTML(initial_tasks)
-            
-            # Calendar Tab
-            with gr.TabItem("Full Calendar", id="calendar_tab"):
-                
-                # Iframe to embed the React calendar app
-                # The calendar will be served from http://localhost:5050 (calendar server)
-                # or from http://localhost:5173 (Vite dev server)
-                calendar_iframe = gr.HTML(
-                    """
-                    <iframe 
-                        src="http://localhost:5050/" 
-                        width="100%" 
-                        height="800px" 
-                        frameborder="0"
-                        style="border: 1px solid #ddd; border-radius: 8px; background: white;"
-                        onload="this.style.display='block';"
-                        onerror="this.innerHTML='<div style=padding:20px;text-align:center;>Calendar app not available. Please ensure:<br>1. Calendar server is running: python backend/calendar_server.py<br>2. Or React dev server is running: cd src && npm run dev</div>';"
-                    >
-                        <p>Loading calendar... If this message persists, please check:</p>
-                        <ol style="text-align: left; display: inline-block;">
-                            <li>Calendar server is running: <code>python backend/calendar_server.py</code></li>
-                            <li>Or React dev server is running: <code>cd src && npm run dev</code></li>
-                            <li>Try accessing directly: <a href="http://localhost:5050" target="_blank">http://localhost:5050</a></li>
-                        </ol>
-                    </iframe>
-                    """
-                )
-             
-
-        demo.load(
-            lambda: initialize_interface(reset=True),
-            inputs=None,
-            outputs=[
-                chatbot,
-                message,
-                conversation_state,
-                schedule_panel,
-                tasks_panel,
-            ],
-        )
-
-        message.submit(
-            handle_user_message,
-            inputs=[message, chatbot, conversation_state],
-            outputs=[
-                chatbot,
-                message,
-                conversation_state,
-                schedule_panel,
-                tasks_panel,
-            ],
-            queue=False,
-        )
-        send.click(
-            handle_user_message,
-            inputs=[message, chatbot, conversation_state],
-            outputs=[
-                chatbot,
-                message,
-                conversation_state,
-                schedule_panel,
-                tasks_panel,
-            ],
-            queue=False,
-        )
-
-        clear_button.click(
-            clear_current_conversation,
-            inputs=[conversation_state],
-            outputs=[
-                chatbot,
-                message,
-                conversation_state,
-                schedule_panel,
-                tasks_panel,
-            ],
-            queue=False,
-        )
-
-    return demo
-
-
-demo = build_app()
-
-
-if __name__ == "__main__":
-    demo.launch()
+import atexit
+import contextlib
+import html
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import functools
+import heapq
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Dict, Generator, List, Optional, Tuple
+
+import sys
+
+from datetime import datetime, date, timedelta
+
+import gradio as gr
+import requests
+from zoneinfo import ZoneInfo
+
+try:  # orjson decodes large event lists ~2-3x faster when available.
+    import orjson as _fast_json
+except ImportError:
+    _fast_json = None
+
+
+def _json_loads(raw: bytes) -> Any:
+    if _fast_json is not None:
+        return _fast_json.loads(raw)
+    return json.loads(raw)
+
+from chat_logic import Message, build_bot_reply, messages_to_history
+from storage import ConversationStore
+
+store = ConversationStore()
+logger = logging.getLogger(__name__)
+CALENDAR_API = os.getenv("VITE_CALENDAR_API", "http://localhost:5050/api")
+# Where the embedded calendar UI loads from. Defaults to the calendar API's
+# origin; override (e.g. to a same-origin proxy path like "/calendar/") so
+# deployments behind a reverse proxy reuse the existing connection instead
+# of opening a second one to a hard-coded localhost port.
+CALENDAR_UI_URL = os.getenv("CALENDAR_UI_URL", CALENDAR_API.rsplit("/api", 1)[0] + "/")
+
+# Embedded React calendar app, injected lazily when the tab is opened.
+_CALENDAR_IFRAME_HTML = f"""
+<iframe
+    src="{CALENDAR_UI_URL}"
+    width="100%"
+    height="800px"
+    frameborder="0"
+    style="border: 1px solid #ddd; border-radius: 8px; background: white;"
+    onload="this.style.display='block';"
+    onerror="this.innerHTML='<div style=padding:20px;text-align:center;>Calendar app not available. Please ensure:<br>1. Calendar server is running: python backend/calendar_server.py<br>2. Or React dev server is running: cd src && npm run dev</div>';"
+>
+    <p>Loading calendar... If this message persists, please check:</p>
+    <ol style="text-align: left; display: inline-block;">
+        <li>Calendar server is running: <code>python backend/calendar_server.py</code></li>
+        <li>Or React dev server is running: <code>cd src && npm run dev</code></li>
+        <li>Try accessing directly: <a href="http://localhost:5050" target="_blank">http://localhost:5050</a></li>
+    </ol>
+</iframe>
+"""
+class _TTLDict:
+    """Bounded dict with per-entry expiry, for long-running processes.
+
+    Keeps the plain-dict surface the call sites already use (``get``,
+    ``pop``, ``in``, item assignment) while evicting stale entries so a
+    per-conversation cache cannot grow without bound.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._data: Dict[Any, Tuple[float, Any]] = {}
+
+    def _prune(self) -> None:
+        # Callers hold self._lock. Drop expired entries first; if still over
+        # budget, drop the oldest entries (insertion order ~= write order).
+        now = time.monotonic()
+        expired = [key for key, (expires, _) in self._data.items() if expires <= now]
+        for key in expired:
+            del self._data[key]
+        while len(self._data) >= self._maxsize:
+            del self._data[next(iter(self._data))]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        with self._lock:
+            if len(self._data) >= self._maxsize:
+                self._prune()
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self._ttl, value)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        expires, value = entry
+        return default if expires <= time.monotonic() else value
+
+
+_LATEST_CREATED_EVENT = _TTLDict(maxsize=10_000, ttl=3600.0)
+LOCAL_TZ = ZoneInfo("Europe/Amsterdam")
+
+# One pooled HTTP session for every calendar API call so keep-alive reuses
+# the TCP connection instead of paying a fresh handshake per request.
+# Transient gateway errors retry twice with a short backoff rather than
+# surfacing straight to the chat as a failed action.
+_SESSION = requests.Session()
+_SESSION.headers.update({"Accept": "application/json", "Connection": "keep-alive"})
+_HTTP_ADAPTER = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=20,
+    max_retries=requests.adapters.Retry(
+        total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]
+    ),
+)
+_SESSION.mount("http://", _HTTP_ADAPTER)
+_SESSION.mount("https://", _HTTP_ADAPTER)
+atexit.register(_SESSION.close)
+
+# Shared worker pool for the independent REST fetches (events + tasks) so
+# handlers pay max(t_events, t_tasks) instead of their sum.
+_FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chatbot-fetch")
+
+CSS_FILE = os.path.join(os.path.dirname(__file__), "static", "chatbot.css")
+PANELS_CSS_FILE = os.path.join(os.path.dirname(__file__), "static", "panels.css")
+
+
+FREE_TIME_KEYWORDS = frozenset({
+    "pool",
+    "swim",
+    "gym",
+    "run",
+    "yoga",
+    "dinner",
+    "lunch",
+    "breakfast",
+    "brunch",
+    "party",
+    "vacation",
+    "holiday",
+    "family",
+    "friends",
+    "hangout",
+    "movie",
+    "concert",
+    "wedding",
+    "birthday",
+    "personal",
+    "relax",
+    "hobby",
+})
+
+# One C-level scan over the text instead of a Python-level substring check
+# per keyword; \b also stops "run" from matching inside "brunch".
+_FREE_TIME_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(keyword) for keyword in sorted(FREE_TIME_KEYWORDS)) + r")\b"
+)
+
+_RESCHEDULE_KEYWORDS = {
+    "move",
+    "reschedule",
+    "resched",
+    "shift",
+    "postpone",
+    "delay",
+    "push",
+    "later",
+    "back",
+}
+
+
+def _infer_category(action: dict | None, default: str = "work") -> str:
+    if not action:
+        return default
+
+    raw = (action.get("new_category") or action.get("category") or "").strip().lower()
+    if raw in {"work", "personal"}:
+        return raw
+
+    # Scan each field directly and stop at the first hit instead of
+    # allocating a joined blob of all four; most actions fill only one
+    # or two of these fields.
+    for key in ("title", "description", "new_title", "new_description"):
+        field = action.get(key)
+        if field and _FREE_TIME_RE.search(str(field).lower()):
+            return "personal"
+
+    return default or "work"
+
+
+# Successful reads are reused for a short window so a single turn (which can
+# touch /events several times) pays for at most one round-trip per endpoint.
+# Writes through apply_calendar_action invalidate the window immediately.
+# After the window lapses the cached payload is kept around as a stale copy:
+# the next fetch revalidates with If-None-Match, and a 304 reuses the parsed
+# list without transferring or decoding the body again.
+_FETCH_CACHE_TTL_SECONDS = 3.0
+_FETCH_CACHE: Dict[str, Tuple[float, List[dict]]] = {}
+_FETCH_ETAGS: Dict[str, str] = {}
+
+
+def _fetch_cache_get(key: str) -> Optional[List[dict]]:
+    entry = _FETCH_CACHE.get(key)
+    if entry and time.monotonic() - entry[0] < _FETCH_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+def _fetch_cache_put(key: str, value: List[dict], etag: Optional[str] = None) -> None:
+    _FETCH_CACHE[key] = (time.monotonic(), value)
+    if etag:
+        _FETCH_ETAGS[key] = etag
+
+
+def _fetch_cache_stale(key: str) -> Optional[List[dict]]:
+    """Return the cached payload even when its freshness window has lapsed."""
+    entry = _FETCH_CACHE.get(key)
+    return entry[1] if entry else None
+
+
+def _conditional_headers(key: str) -> Dict[str, str]:
+    etag = _FETCH_ETAGS.get(key)
+    if etag and _FETCH_CACHE.get(key) is not None:
+        return {"If-None-Match": etag}
+    return {}
+
+
+def _invalidate_fetch_cache(*keys: str) -> None:
+    for key in keys or ("events", "tasks"):
+        _FETCH_CACHE.pop(key, None)
+        _FETCH_ETAGS.pop(key, None)
+
+
+def fetch_calendar_events(_: Optional[str]) -> List[dict]:
+    """Fetch events from the calendar server REST API."""
+    cached = _fetch_cache_get("events")
+    if cached is not None:
+        return cached
+    try:
+        response = _SESSION.get(
+            f"{CALENDAR_API}/events", timeout=10, headers=_conditional_headers("events")
+        )
+        if response.status_code == 304:
+            stale = _fetch_cache_stale("events")
+            if stale is not None:
+                _fetch_cache_put("events", stale)
+                return stale
+        response.raise_for_status()
+        events = _json_loads(response.content)
+        if isinstance(events, list):
+            _fetch_cache_put("events", events, etag=response.headers.get("ETag"))
+            return events
+    except Exception as exc:
+        print(f"[chatbot] Failed to load calendar events: {exc}")
+    return []
+
+
+def get_todays_events(events: List[dict]) -> Tuple[dict, ...]:
+    """Filter already-fetched calendar events down to the current day.
+
+    A pure filter: callers fetch the event list once per turn and reuse it
+    for both this and any other event-derived output.
+    """
+    today_str = date.today().isoformat()
+    return tuple(
+        event for event in events if event.get("startDate") == today_str
+    )
+
+
+def fetch_task_list(_: Optional[str]) -> List[dict]:
+    """Fetch tasks captured by the agent from the calendar server REST API."""
+    cached = _fetch_cache_get("tasks")
+    if cached is not None:
+        return cached
+    try:
+        response = _SESSION.get(
+            f"{CALENDAR_API}/tasks", timeout=10, headers=_conditional_headers("tasks")
+        )
+        if response.status_code == 304:
+            stale = _fetch_cache_stale("tasks")
+            if stale is not None:
+                _fetch_cache_put("tasks", stale)
+                return stale
+        response.raise_for_status()
+        payload = _json_loads(response.content)
+    except Exception as exc:
+        print(f"[chatbot] Failed to load tasks: {exc}")
+        return []
+
+    if not isinstance(payload, list):
+        return []
+
+    tasks: List[dict] = []
+    for item in payload:
+        tasks.append(
+            {
+                "title": item.get("title") or "Untitled task",
+                "description": item.get("description") or "",
+                "dueDate": item.get("date_of_meeting"),
+                "dueTime": item.get("start_time"),
+                "completed": item.get("meeting_completed", False),
+            }
+        )
+    _fetch_cache_put("tasks", tasks, etag=response.headers.get("ETag"))
+    return tasks
+
+
+# Times on these paths are always "HH:MM"; plain integer arithmetic avoids
+# the strptime/datetime machinery on every reschedule step.
+def _hhmm_to_minutes(value: str) -> int:
+    hour, _, minute = value.partition(":")
+    return int(hour) * 60 + int(minute)
+
+
+def _minutes_to_hhmm(total: int) -> str:
+    return f"{total // 60:02d}:{total % 60:02d}"
+
+
+# The "09:00" fallback, pre-converted once.
+_DEFAULT_START_MIN = 9 * 60
+
+
+def _add_one_hour(start_time: str) -> str:
+    normal = _normalise_time(start_time)
+    base = _hhmm_to_minutes(normal) if normal else _DEFAULT_START_MIN
+    return _minutes_to_hhmm((base + 60) % (24 * 60))
+
+
+def _normalise_time(value: str | None) -> str | None:
+    if not value:
+        return None
+    value = value.strip()
+    hour, sep, minute = value.partition(":")
+    if (
+        sep
+        and 1 <= len(hour) <= 2
+        and hour.isdigit()
+        and 1 <= len(minute) <= 2
+        and minute.isdigit()
+        and int(hour) < 24
+        and int(minute) < 60
+    ):
+        return value
+    return None
+
+
+# Fast path for the common "H", "HH" and "HH:MM" shapes; one regex scan
+# instead of up to three strptime attempts per candidate in the matching loops.
+_TIME_RE = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*$")
+_AM_PM_RE = re.compile(
+    r"^(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm)$",
+    re.IGNORECASE,
+)
+
+
+def _coerce_time_string(value: str | None) -> str:
+    if not value:
+        return ""
+    value = value.strip()
+    if not value:
+        return ""
+
+    match = _TIME_RE.match(value)
+    if match:
+        hour = int(match.group(1))
+        minute = int(match.group(2) or 0)
+        if hour < 24 and minute < 60:
+            return f"{hour:02d}:{minute:02d}"
+
+    am_pm_match = _AM_PM_RE.match(value)
+    if am_pm_match:
+        hour = int(am_pm_match.group("hour"))
+        minute = int(am_pm_match.group("minute") or "00")
+        meridiem = am_pm_match.group("meridiem").lower()
+        hour = hour % 12
+        if meridiem == "pm":
+            hour += 12
+        return f"{hour:02d}:{minute:02d}"
+
+    if len(value) >= 5 and value[2] == ":":
+        # e.g. "HH:MM:SS" — keep just the hour and minute.
+        normal = _normalise_time(value[:5])
+        if normal:
+            return normal
+
+    return value
+
+
+_NUMBER_WORDS = {
+    "zero": 0,
+    "a": 1,
+    "an": 1,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "half": 0.5,
+    "quarter": 0.25,
+}
+
+_NEGATIVE_KEYWORDS = {"earlier", "before", "forward", "sooner", "ahead"}
+
+_BULK_DELETE_KEYWORDS = {
+    "all",
+    "every",
+    "entire",
+    "remove all",
+    "delete all",
+    "clear all",
+    "wipe",
+}
+
+# Single compiled alternation so _wants_bulk_delete scans each text once
+# instead of once per keyword. Plain substring semantics (no \b) are kept
+# intentionally to match the previous `keyword in combined` behaviour;
+# IGNORECASE replaces the .lower() copies the call sites used to make.
+_BULK_DELETE_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(_BULK_DELETE_KEYWORDS)),
+    re.IGNORECASE,
+)
+
+
+# Compiled once; _parse_time_offset runs on every user message. The input is
+# lowercased before searching, so no IGNORECASE flag is needed.
+_IN_OFFSET_RE = re.compile(
+    r"in\s+(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>hours?|hrs?|minutes?|mins?)"
+)
+_NUMERIC_OFFSET_RE = re.compile(
+    r"(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>hours?|hrs?|minutes?|mins?)(?:\s*(?P<direction>later|after|earlier|before|forward|sooner|back))?"
+)
+_WORD_OFFSET_RE = re.compile(
+    r"(?P<amount_word>zero|a|an|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|half|quarter)\s*(?P<unit>hours?|hrs?|minutes?|mins?)(?:\s*(?P<direction>later|after|earlier|before|forward|sooner|back))?"
+)
+
+
+def _parse_time_offset(text: Optional[str]) -> Optional[int]:
+    if not text:
+        return None
+    lowered = text.lower()
+
+    match = _IN_OFFSET_RE.search(lowered)
+    if match:
+        amount = float(match.group("amount"))
+        unit = match.group("unit")
+        direction = "later"
+    else:
+        match = _NUMERIC_OFFSET_RE.search(lowered)
+        if match:
+            amount = float(match.group("amount"))
+            unit = match.group("unit")
+            direction = match.group("direction") or "later"
+        else:
+            match = _WORD_OFFSET_RE.search(lowered)
+            if not match:
+                return None
+            amount = _NUMBER_WORDS.get(match.group("amount_word"))
+            if amount is None:
+                return None
+            unit = match.group("unit")
+            direction = match.group("direction") or "later"
+
+    if unit.startswith("hour") or unit.startswith("hr"):
+        minutes = int(amount * 60)
+    else:
+        minutes = int(amount * 1)
+
+    if direction in _NEGATIVE_KEYWORDS:
+        minutes *= -1
+    return minutes
+
+
+def _add_minutes_to_time(start_time: Optional[str], minutes: int, default: str = "09:00") -> str:
+    normal = _normalise_time(start_time)
+    if normal:
+        base = _hhmm_to_minutes(normal)
+    else:
+        default_normal = _normalise_time(default)
+        base = _hhmm_to_minutes(default_normal) if default_normal else _DEFAULT_START_MIN
+    total = max(0, min(base + minutes, 23 * 60 + 59))
+    return _minutes_to_hhmm(total)
+
+
+def _compute_duration_minutes(start_time: Optional[str], end_time: Optional[str]) -> Optional[int]:
+    start_normal = _normalise_time(start_time)
+    end_normal = _normalise_time(end_time)
+    if not start_normal or not end_normal:
+        return None
+    minutes = _hhmm_to_minutes(end_normal) - _hhmm_to_minutes(start_normal)
+    return minutes if minutes > 0 else None
+
+
+def _bulk_delete_events(ids: List[str]) -> Optional[int]:
+    """Delete many events in one request; None means the endpoint is
+    unavailable (older server) and callers should fall back to per-id
+    deletes."""
+    if not ids:
+        return 0
+    try:
+        resp = _SESSION.post(
+            f"{CALENDAR_API}/events/bulk_delete", json={"ids": ids}, timeout=15
+        )
+        if resp.status_code in {404, 405}:
+            return None
+        resp.raise_for_status()
+        data = _json_loads(resp.content)
+        return int(data.get("deleted", 0))
+    except Exception as exc:
+        logger.warning("Bulk delete request failed: %s", exc)
+        return None
+
+
+def _first(d: Optional[dict], *keys: str, default: Any = None) -> Any:
+    """Return the first truthy value among ``keys`` in ``d``."""
+    if d:
+        for key in keys:
+            value = d.get(key)
+            if value:
+                return value
+    return default
+
+
+def apply_calendar_action(
+    action: Optional[dict],
+    user_message: Optional[str] = None,
+    conversation_id: Optional[str] = None,
+) -> Optional[str]:
+    if not action or action.get("action") in (None, "none"):
+        return None
+
+    action_type = action.get("action")
+
+    if action_type == "create":
+        date_str = _first(action, "date", "date_of_meeting", default="").strip()
+        offset_minutes = _parse_time_offset(user_message)
+        if offset_minutes is not None:
+            now_local = datetime.now(LOCAL_TZ)
+            target_dt = now_local + timedelta(minutes=offset_minutes)
+            date_str = target_dt.date().isoformat()
+            action["start_time"] = target_dt.strftime("%H:%M")
+            if not _first(action, "end_time", "endTime"):
+                action["end_time"] = (target_dt + timedelta(hours=1)).strftime("%H:%M")
+
+        if not date_str:
+            events = fetch_calendar_events(None)
+            suggestions = _suggest_free_days(events, today=datetime.now(LOCAL_TZ).date())
+            if suggestions:
+                lines = [
+                    "I need a date to schedule that meeting. Here are some upcoming days with availability:",
+                ]
+                for day_str, count in suggestions:
+                    availability = "free" if count == 0 else _format_count(count, "meeting", "meetings")
+                    lines.append(f"- {day_str}: {availability}")
+                lines.append("Let me know which day works best for you.")
+                return "\n".join(lines)
+            return "⚠️ I couldn’t find an open day yet. Please tell me which date you prefer."
+
+        start_time = _coerce_time_string(_first(action, "start_time", "startTime"))
+        start_time = _normalise_time(start_time)
+        end_time = _normalise_time(_first(action, "end_time", "endTime"))
+
+        if not start_time:
+            events = fetch_calendar_events(None)
+            free_slots = _find_free_slots_for_date(events, date_str, 60)
+            if free_slots:
+                slots_text = ", ".join(free_slots)
+                return f"I need a start time for {date_str}. Free slots include {slots_text}. Which one should I book?"
+            return f"⚠️ {date_str} is fully booked. Please choose another time or day."
+
+        if not end_time:
+            end_time = _add_one_hour(start_time)
+
+        title = (action.get("title") or "Meeting").strip() or "Meeting"
+        description = (action.get("description") or "").strip()
+
+        if start_time and _looks_like_reschedule(action, user_message):
+            existing_events = fetch_calendar_events(None)
+            _maybe_delete_reschedule_conflict(
+                existing_events,
+                title,
+                date_str,
+                start_time,
+                action,
+                user_message,
+                conversation_id,
+            )
+
+        payload = {
+            "title": title,
+            "description": description,
+            "startDate": date_str,
+            "endDate": date_str,
+            "startTime": start_time,
+            "endTime": end_time,
+            "category": action.get("category") or "work",
+        }
+
+        try:
+            resp = _SESSION.post(f"{CALENDAR_API}/events", json=payload, timeout=10)
+            resp.raise_for_status()
+            _invalidate_fetch_cache("events")
+            created_event = resp.json()
+            if conversation_id and isinstance(created_event, dict):
+                _LATEST_CREATED_EVENT[conversation_id] = created_event
+        except Exception as exc:
+            logger.warning("Failed to create calendar event: %s", exc)
+            return "⚠️ I tried to add that meeting but something went wrong."
+
+        logger.info("Created calendar event: %s", payload)
+        return f"✅ Scheduled “{title}” on {date_str} at {start_time}."
+
+    if action_type in {"delete", "reschedule"}:
+        try:
+            events = fetch_calendar_events(None)
+        except Exception:
+            events = []
+
+        by_id = {ev.get("id"): ev for ev in events if ev.get("id")}
+
+        target_event: Optional[dict] = None
+        candidate_id = _first(action, "event_id", "id")
+        title_hint = (action.get("title") or "").strip().lower()
+        date_hint = _first(action, "date", "date_of_meeting", default="").strip()
+        raw_time_hint = _first(action, "start_time", "startTime", default="").strip()
+        time_hint = _coerce_time_string(raw_time_hint)
+
+        if action_type == "delete" and _wants_bulk_delete(action, user_message):
+            bulk_targets = []
+            if date_hint:
+                bulk_targets = [
+                    event
+                    for event in events
+                    if (event.get("startDate") or event.get("date_of_meeting") or "") == date_hint
+                ]
+            else:
+                bulk_targets = events[:]
+
+            if bulk_targets:
+                target_ids = [ev.get("id") for ev in bulk_targets if ev.get("id")]
+
+                # One bulk request replaces N DELETEs when the server
+                # supports it; otherwise fall back to concurrent per-id
+                # deletes through the worker pool.
+                bulk_deleted = _bulk_delete_events(target_ids)
+                if bulk_deleted is not None:
+                    deleted_ids = set(target_ids)
+                    deleted_count = bulk_deleted
+                else:
+                    def _delete_one(event: dict) -> Optional[str]:
+                        eid = event.get("id")
+                        if not eid:
+                            return None
+                        try:
+                            resp = _SESSION.delete(f"{CALENDAR_API}/events/{eid}", timeout=10)
+                            if resp.status_code in {200, 204, 404}:
+                                return eid
+                            resp.raise_for_status()
+                        except Exception as exc:
+                            logger.warning("Failed to delete calendar event (bulk): %s", exc)
+                        return None
+
+                    deleted_ids = {
+                        eid for eid in _FETCH_POOL.map(_delete_one, bulk_targets) if eid
+                    }
+                    deleted_count = len(deleted_ids)
+                if (
+                    conversation_id
+                    and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") in deleted_ids
+                ):
+                    _LATEST_CREATED_EVENT.pop(conversation_id, None)
+
+                if deleted_count:
+                    _invalidate_fetch_cache("events")
+                    descriptor = date_hint or "your calendar"
+                    return f"🗑️ Removed {_format_count(deleted_count, 'meeting', 'meetings')} from {descriptor}."
+                return "⚠️ I tried to remove those meetings but something went wrong."
+
+        if candidate_id and not target_event:
+            target_event = by_id.get(candidate_id)
+
+        # Fully-hinted requests resolve with one dict lookup on the normalized
+        # (title, date, time) triple; partial hints fall through to the scan.
+        if not candidate_id and title_hint and date_hint and time_hint:
+            index: Dict[Tuple[str, str, str], dict] = {}
+            for event in events:
+                key = (
+                    (event.get("title") or "").lower(),
+                    event.get("startDate") or event.get("date_of_meeting") or "",
+                    _coerce_time_string(event.get("startTime") or event.get("start_time") or ""),
+                )
+                index.setdefault(key, event)
+            exact = index.get((title_hint, date_hint, time_hint))
+            if exact:
+                target_event = exact
+                candidate_id = exact.get("id")
+
+        if not candidate_id:
+            # One pass recording both a strict (time matched) and a loose
+            # (title/date only) candidate, so a missed time hint still
+            # resolves without a second scan.
+            strict: Optional[dict] = None
+            loose: Optional[dict] = None
+            if date_hint:
+                # Restrict the scan to the hinted day up front.
+                candidates = [
+                    ev
+                    for ev in events
+                    if (ev.get("startDate") or ev.get("date_of_meeting") or "") == date_hint
+                ]
+            else:
+                candidates = events
+            for event in candidates:
+                event_title = (event.get("title") or "").lower()
+                event_time = event.get("startTime") or event.get("start_time") or ""
+
+                if title_hint and title_hint not in event_title:
+                    continue
+                if time_hint and time_hint != event_time:
+                    if loose is None:
+                        loose = event
+                    continue
+                strict = event
+                break
+            matched = strict or loose
+            if matched:
+                candidate_id = matched.get("id")
+                target_event = matched
+
+        if not candidate_id:
+            logger.debug("Calendar delete: fell back to events search, candidate=%s", candidate_id)
+
+        if not candidate_id:
+            logger.debug("Calendar delete/reschedule ignored: no matching event for %s", action)
+            if action_type == "delete" and events:
+                return _build_delete_suggestion(events)
+            return "⚠️ I couldn’t find a matching meeting to delete." if action_type == "delete" else "⚠️ I couldn’t find the meeting to reschedule."
+
+        if not target_event and candidate_id:
+            target_event = by_id.get(candidate_id)
+
+        latest_request = (
+            action_type == "delete"
+            and conversation_id
+            and conversation_id in _LATEST_CREATED_EVENT
+            and user_message
+            and any(
+                keyword in user_message.lower()
+                for keyword in ["latest", "last", "recent", "just created"]
+            )
+        )
+        if latest_request and not candidate_id:
+            candidate_id = _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id")
+
+        try:
+            resp = _SESSION.delete(f"{CALENDAR_API}/events/{candidate_id}", timeout=10)
+            if resp.status_code == 404:
+                return "⚠️ I couldn’t find a matching meeting to delete."
+            resp.raise_for_status()
+            _invalidate_fetch_cache("events")
+        except Exception as exc:
+            logger.warning("Failed to delete calendar event: %s", exc)
+            return "⚠️ I tried to remove that meeting but something went wrong."
+
+        logger.info("Deleted calendar event id=%s", candidate_id)
+        if conversation_id and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") == candidate_id:
+            _LATEST_CREATED_EVENT.pop(conversation_id, None)
+
+        if action_type == "delete":
+            return "🗑️ Removed the meeting from your calendar."
+
+        # Reschedule branch
+        if not target_event:
+            logger.debug("Reschedule: deleted event but missing cached details, cannot recreate")
+            return "⚠️ Removed the original meeting but couldn’t create the new one."  # Unlikely
+
+        existing_title = target_event.get("title") or "Meeting"
+        existing_description = target_event.get("description") or ""
+        existing_date = _first(target_event, "startDate", "date_of_meeting", default="")
+        existing_start = _first(target_event, "startTime", "start_time", "time", default="09:00")
+        existing_end = _first(target_event, "endTime", "end_time", default="")
+        existing_category = target_event.get("category") or "work"
+        existing_duration = _compute_duration_minutes(existing_start, existing_end)
+
+        new_title = _first(action, "new_title", "title", default=existing_title).strip() or existing_title
+        new_description = _first(action, "new_description", "description", default=existing_description).strip()
+        new_date = _first(action, "new_date", "date", "date_of_meeting", default=existing_date).strip() or existing_date
+
+        new_start_candidate = _coerce_time_string(
+            _first(action, "new_start_time", "start_time", "startTime")
+        )
+        new_start = _normalise_time(new_start_candidate)
+
+        offset_minutes = _parse_time_offset(user_message)
+        if offset_minutes is not None:
+            base_for_offset = existing_start or new_start or "09:00"
+            new_start = _add_minutes_to_time(base_for_offset, offset_minutes)
+
+        if not new_start:
+            new_start = existing_start or "09:00"
+
+        new_end_candidate = _coerce_time_string(
+            _first(action, "new_end_time", "end_time", "endTime")
+        )
+        new_end = _normalise_time(new_end_candidate)
+
+        if offset_minutes is not None and existing_duration is not None:
+            new_end = _add_minutes_to_time(new_start, existing_duration)
+
+        if not new_end:
+            if existing_duration is not None:
+                new_end = _add_minutes_to_time(new_start, existing_duration)
+            else:
+                new_end = _add_one_hour(new_start)
+
+        category = _infer_category({**(action or {}), **target_event}, default=existing_category or "work")
+
+        payload = {
+            "title": new_title,
+            "description": new_description,
+            "startDate": new_date,
+            "endDate": new_date,
+            "startTime": new_start,
+            "endTime": new_end,
+            "category": category,
+            "time": new_start,
+        }
+
+        try:
+            resp = _SESSION.post(f"{CALENDAR_API}/events", json=payload, timeout=10)
+            resp.raise_for_status()
+            _invalidate_fetch_cache("events")
+            created_event = resp.json()
+            if conversation_id and isinstance(created_event, dict):
+                _LATEST_CREATED_EVENT[conversation_id] = created_event
+        except Exception as exc:
+            logger.warning("Failed to create rescheduled event: %s", exc)
+            return "⚠️ I removed the original meeting but couldn’t create the new one."
+
+        logger.info("Rescheduled calendar event: %s -> %s", target_event.get("id"), payload)
+        return f"🔁 Rescheduled “{new_title}” for {new_date} at {new_start}."
+
+    return None
+
+
+_HOURS = tuple(f"{hour:02d}:00" for hour in range(8, 23))
+_ROW_TEMPLATE = (
+    '<div class="{cls}"><div class="schedule-time">{hour}</div>'
+    '<div class="schedule-title">{content}</div></div>'
+)
+_EMPTY_SPAN = '<span class="schedule-empty">– free –</span>'
+_ROW_NORMAL = "schedule-row"
+_ROW_MEETING = "schedule-row has-meeting"
+_TASKS_EMPTY = '<ul class="tasks-list"><li class="task-empty">No tasks yet.</li></ul>'
+
+# Same five substitutions as html.escape(quote=True), but str.translate does
+# them in one pass over the string instead of five chained replace() sweeps.
+_HTML_TRANS = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+def render_schedule(events: List[dict]) -> str:
+    return _render_schedule_cached(
+        tuple(
+            (
+                event.get("title"),
+                event.get("startTime"),
+                event.get("endTime"),
+                event.get("description"),
+            )
+            for event in events
+        )
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _render_schedule_cached(events_key: Tuple[Tuple, ...]) -> str:
+    """Build the schedule HTML for a fingerprint of (title, start, end, desc).
+
+    The fingerprint carries every field the renderer reads, so identical
+    event data across turns resolves to the cached HTML string.
+    """
+    slots: Dict[str, List[str]] = {hour: [] for hour in _HOURS}
+    all_day: List[str] = []
+
+    for title_raw, start_time, end_time, description_raw in events_key:
+        title = (title_raw or "Untitled event").translate(_HTML_TRANS)
+        time_range = ""
+        if start_time and end_time:
+            time_range = f"{start_time}–{end_time}"
+        elif start_time:
+            time_range = start_time
+
+        description = (description_raw or "").translate(_HTML_TRANS)
+        parts = [title]
+        if time_range:
+            parts.append(f" · {time_range}")
+        if description:
+            parts.append(f"<br><small>{description}</small>")
+        meta = "".join(parts)
+
+        if start_time:
+            hour_slot = f"{start_time[:2]}:00"
+            if hour_slot in slots:
+                slots[hour_slot].append(meta)
+            else:
+                # Outside the rendered 08:00–22:00 window; surface it in the
+                # All Day row instead of a phantom bucket that never renders.
+                all_day.append(meta)
+        else:
+            all_day.append(meta)
+
+    all_day_row = ""
+    if all_day:
+        all_day_row = (
+            '<div class="schedule-row has-meeting">'
+            '<div class="schedule-time">All Day</div>'
+            f'<div class="schedule-title">{"<br>".join(all_day)}</div>'
+            "</div>"
+        )
+
+    rows = [
+        _ROW_TEMPLATE.format(
+            cls=_ROW_MEETING if slots[hour] else _ROW_NORMAL,
+            hour=hour,
+            content="<br>".join(slots[hour]) if slots[hour] else _EMPTY_SPAN,
+        )
+        for hour in _HOURS
+    ]
+
+    return f'<div class="schedule-grid">{all_day_row}{"".join(rows)}</div>'
+
+
+def render_tasks(tasks: List[dict]) -> str:
+    return _render_tasks_cached(
+        tuple(
+            (task.get("title", "Untitled task"), task.get("description") or "")
+            for task in tasks
+        )
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _render_tasks_cached(tasks_key: Tuple[Tuple[str, str], ...]) -> str:
+    if not tasks_key:
+        return _TASKS_EMPTY
+
+    items: List[str] = []
+    for title_raw, description_raw in tasks_key:
+        title = title_raw.translate(_HTML_TRANS)
+        desc_html = ""
+        if description_raw:
+            description_raw = description_raw.strip()
+            if len(description_raw) > 140:
+                description_raw = description_raw[:137] + "..."
+            if description_raw:
+                desc_html = (
+                    '<div class="task-desc">'
+                    f"{description_raw.translate(_HTML_TRANS)}</div>"
+                )
+        items.append(f'<li><span class="task-title">{title}</span>{desc_html}</li>')
+    return f'<ul class="tasks-list">{"".join(items)}</ul>'
+
+
+def _render_panels(conversation_id: Optional[str]) -> Tuple[str, str]:
+    """Render the schedule and tasks panels from the current backend data.
+
+    The two REST fetches are independent, so they run concurrently and the
+    combined wait is max(t_events, t_tasks) instead of their sum.
+    """
+    events_future = _FETCH_POOL.submit(fetch_calendar_events, conversation_id)
+    tasks_future = _FETCH_POOL.submit(fetch_task_list, conversation_id)
+    schedule_html = render_schedule(get_todays_events(events_future.result()))
+    tasks_html = render_tasks(tasks_future.result())
+    return schedule_html, tasks_html
+
+
+# The agent gets its own single worker so a slow run never blocks panel
+# fetches, and repeated clicks queue up instead of running concurrently.
+_AGENT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chatbot-agent")
+
+_AGENT_MODULE = None
+
+# In-flight agent runs keyed by conversation; a double-click attaches to the
+# running future instead of burning a second agent run.
+_AGENT_INFLIGHT: Dict[str, Any] = {}
+_AGENT_INFLIGHT_LOCK = threading.Lock()
+
+
+def _load_agent_module():
+    """Import backend/agent.py once and reuse it for every agent run."""
+    global _AGENT_MODULE
+    if _AGENT_MODULE is None:
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        backend_dir = os.path.join(project_root, "backend")
+        if backend_dir not in sys.path:
+            sys.path.insert(0, backend_dir)
+        import agent  # noqa: E402 - backend module, resolved via the path insert
+
+        _AGENT_MODULE = agent
+    return _AGENT_MODULE
+
+
+def _run_agent_inprocess() -> str:
+    """Run master_agent() in this interpreter and return its printed output."""
+    module = _load_agent_module()
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            module.master_agent()
+    except SystemExit as exc:
+        raise RuntimeError(f"agent exited with code {exc.code}") from exc
+    return buffer.getvalue()
+
+
+_AGENT_PROGRESS_TMPL = """
+<div style="padding: 12px; margin-bottom: 12px; background: linear-gradient(135deg, #4488ff22 0%, #2266ff22 100%); border-radius: 8px; border: 2px solid #4488ff44;">
+    <div style="font-weight: 600; color: #2255cc; margin-bottom: 4px;">⏳ AI Agent Running</div>
+    <div style="font-size: 0.9em; color: #666;">{status}</div>
+</div>
+"""
+
+# Constant banner envelopes for run_agent_background, built once at import;
+# each run only interpolates the two or three variable fields.
+_AGENT_SUCCESS_TMPL = """
+<div style="padding: 12px; margin-bottom: 12px; background: linear-gradient(135deg, #00ff8822 0%, #00ff4422 100%); border-radius: 8px; border: 2px solid #00ff8844;">
+    <div style="font-weight: 600; color: #00aa44; margin-bottom: 4px;">✓ AI Agent Completed</div>
+    <div style="font-size: 0.9em; color: #666;">
+        Added {new_meetings} new meeting(s) and {new_tasks} new task(s)
+        <br>Total: {meetings_count} meeting(s) and {tasks_count} task(s)
+    </div>
+</div>
+"""
+
+_AGENT_NO_CHANGE_HTML = """
+<div style="padding: 12px; margin-bottom: 12px; background: linear-gradient(135deg, #ffaa0022 0%, #ff880022 100%); border-radius: 8px; border: 2px solid #ffaa0044;">
+    <div style="font-weight: 600; color: #cc6600; margin-bottom: 4px;">✓ AI Agent Completed</div>
+    <div style="font-size: 0.9em; color: #666;">No new meetings or tasks found</div>
+</div>
+"""
+
+_AGENT_TIMEOUT_HTML = """
+<div style="padding: 12px; background: linear-gradient(135deg, #ffaa0022 0%, #ff880022 100%); border-radius: 8px; border: 2px solid #ffaa0044;">
+    <div style="font-weight: 600; color: #cc6600; margin-bottom: 4px;">⏱ AI Agent Timeout</div>
+    <div style="font-size: 0.9em; color: #666;">Processing took longer than 5 minutes</div>
+</div>
+"""
+
+_AGENT_ERROR_TMPL = """
+<div style="padding: 12px; background: linear-gradient(135deg, #ff444422 0%, #ff000022 100%); border-radius: 8px; border: 2px solid #ff444444;">
+    <div style="font-weight: 600; color: #cc0000; margin-bottom: 4px;">✗ Error Running Agent</div>
+    <div style="font-size: 0.9em; color: #666;">{error}</div>
+</div>
+"""
+
+
+def run_agent_background(
+    conversation_id: Optional[str],
+) -> Generator[Tuple[Any, Any], None, None]:
+    """
+    Run the backend agent in-process and wait for scheduler to process results,
+    yielding progress banners over SSE so the UI never looks stuck.
+    """
+    try:
+        print("[chatbot] Starting AI agent (in-process)")
+        yield _AGENT_PROGRESS_TMPL.format(status="Checking Slack for new meetings and tasks…"), gr.update()
+
+        # Get initial counts to compare later. The two fetches hit independent
+        # endpoints, so run them concurrently and wait max(t) instead of sum(t).
+        events_future = _FETCH_POOL.submit(fetch_calendar_events, conversation_id)
+        tasks_future = _FETCH_POOL.submit(fetch_task_list, conversation_id)
+        initial_event_count = len(events_future.result())
+        initial_task_count = len(tasks_future.result())
+
+        # Run the agent on the dedicated worker thread; importing the module
+        # once avoids paying interpreter startup for every run, and the
+        # single-worker pool keeps concurrent clicks from overlapping.
+        # Poll the future so we can surface elapsed time while it works.
+        # Duplicate clicks for the same conversation share one future.
+        inflight_key = conversation_id or "primary"
+        with _AGENT_INFLIGHT_LOCK:
+            future = _AGENT_INFLIGHT.get(inflight_key)
+            if future is None or future.done():
+                future = _AGENT_POOL.submit(_run_agent_inprocess)
+                _AGENT_INFLIGHT[inflight_key] = future
+        waited = 0
+        while True:
+            try:
+                agent_output = future.result(timeout=10)
+                with _AGENT_INFLIGHT_LOCK:
+                    if _AGENT_INFLIGHT.get(inflight_key) is future:
+                        _AGENT_INFLIGHT.pop(inflight_key, None)
+                break
+            except FutureTimeout:
+                waited += 10
+                if waited >= 300:
+                    raise
+                yield _AGENT_PROGRESS_TMPL.format(
+                    status=f"Agent still working… ({waited}s elapsed)"
+                ), gr.update()
+
+        print("[chatbot] AI agent completed successfully")
+        print(f"[chatbot] Agent output:\n{agent_output}")
+
+        # master_agent() writes meetings/tasks to the database synchronously
+        # before returning, so once the future resolves the data is already
+        # in place — no scheduler to wait on. Drop the TTL cache and fetch
+        # the final state exactly once instead of polling the API.
+        _invalidate_fetch_cache()
+
+        # Fetch final data, overlapping the two requests.
+        events_future = _FETCH_POOL.submit(fetch_calendar_events, conversation_id)
+        tasks_future = _FETCH_POOL.submit(fetch_task_list, conversation_id)
+        final_events = events_future.result()
+        final_tasks = tasks_future.result()
+        meetings_count = len(final_events)
+        tasks_count = len(final_tasks)
+        
+        # Calculate what was added
+        new_meetings = meetings_count - initial_event_count
+        new_tasks = tasks_count - initial_task_count
+        
+        # Render the updated panels
+        schedule_html = render_schedule(get_todays_events(final_events))
+        tasks_html = render_tasks(final_tasks)
+        
+        # Add success message with actual counts
+        if new_meetings > 0 or new_tasks > 0:
+            banner = _AGENT_SUCCESS_TMPL.format(
+                new_meetings=new_meetings,
+                new_tasks=new_tasks,
+                meetings_count=meetings_count,
+                tasks_count=tasks_count,
+            )
+        else:
+            banner = _AGENT_NO_CHANGE_HTML
+
+        yield banner + schedule_html, tasks_html
+
+    except FutureTimeout:
+        print(f"[chatbot] AI agent timed out after 5 minutes")
+        
+        schedule_html, tasks_html = _render_panels(conversation_id)
+
+        yield _AGENT_TIMEOUT_HTML + schedule_html, tasks_html
+
+    except Exception as exc:
+        print(f"[chatbot] Failed to run AI agent: {exc}")
+        
+        error_msg = _AGENT_ERROR_TMPL.format(error=html.escape(str(exc)))
+
+        schedule_html, tasks_html = _render_panels(conversation_id)
+
+        yield error_msg + schedule_html, tasks_html
+
+
+# Chatbot history per conversation, keyed to the number of raw store messages
+# already converted, so each turn only converts the newly appended tail.
+_HISTORY_CACHE: Dict[str, Tuple[int, List[Message]]] = {}
+
+
+def _history_for(conversation_id: str) -> List[Message]:
+    seen_count, history = _HISTORY_CACHE.get(conversation_id, (0, []))
+    new_messages = store.fetch_messages(conversation_id, since=seen_count)
+    if new_messages:
+        history = history + messages_to_history(new_messages)
+        _HISTORY_CACHE[conversation_id] = (seen_count + len(new_messages), history)
+    return history
+
+
+# Duplicate submissions of the same text within this window reuse the
+# previous result. Keyed per conversation so concurrent sessions sending
+# identical text can never replay each other's history. Largely a safety
+# net now that the consolidated gr.on trigger fires the handler once per
+# submit, but it still absorbs client-side double-fires.
+_SUBMIT_COALESCE_SECONDS = 0.05
+_LAST_SUBMIT: Dict[str, Any] = {"at": 0.0, "key": None, "result": None}
+
+
+def handle_user_message(
+    message: str,
+    history: List[Message],
+    conversation_id: Optional[str],
+) -> Generator[Tuple[List[Message], str, str, Any, Any], None, None]:
+    history = history or []
+    cleaned = message.strip()
+
+    conversation_id = conversation_id or store.default_conversation_id()
+
+    if not cleaned:
+        schedule_html, tasks_html = _render_panels(conversation_id)
+        yield history, "", conversation_id, schedule_html, tasks_html
+        return
+
+    now = time.monotonic()
+    submit_key = (conversation_id, cleaned)
+    if (
+        submit_key == _LAST_SUBMIT["key"]
+        and now - _LAST_SUBMIT["at"] < _SUBMIT_COALESCE_SECONDS
+        and _LAST_SUBMIT["result"] is not None
+    ):
+        yield _LAST_SUBMIT["result"]
+        return
+
+    # Paint the user's message and clear the box before the LLM round trip;
+    # the panels keep their current contents until the final yield.
+    pending_history = history + [{"role": "user", "content": cleaned}]
+    yield pending_history, "", conversation_id, gr.update(), gr.update()
+
+    store.append_message(conversation_id, "user", cleaned)
+    bot_reply, calendar_action = build_bot_reply(cleaned, history)
+    action_feedback = apply_calendar_action(calendar_action, cleaned, conversation_id)
+    if action_feedback:
+        bot_reply = f"{bot_reply}\n\n{action_feedback}"
+    store.append_message(conversation_id, "assistant", bot_reply)
+
+    updated_history = _history_for(conversation_id)
+    if calendar_action and calendar_action.get("action") not in (None, "none"):
+        schedule_html, tasks_html = _render_panels(conversation_id)
+    else:
+        # Nothing touched the calendar; skip re-serializing the panel HTML.
+        schedule_html, tasks_html = gr.skip(), gr.skip()
+    result = updated_history, "", conversation_id, schedule_html, tasks_html
+    _LAST_SUBMIT.update(at=time.monotonic(), key=submit_key, result=result)
+    yield result
+
+
+def initialize_interface(reset: bool = False) -> Tuple[List[Message], str, str, str, str]:
+    # Kick the calendar/task fetches off first so the HTTP round trips
+    # overlap the SQLite reads instead of queuing behind them.
+    events_future = _FETCH_POOL.submit(fetch_calendar_events, None)
+    tasks_future = _FETCH_POOL.submit(fetch_task_list, None)
+    bundle = store.fetch_conversation_bundle()
+    conversation_id = bundle["conversation"]["_id"]
+    if reset:
+        store.reset_conversation(conversation_id)
+        _HISTORY_CACHE.pop(conversation_id, None)
+        _LATEST_CREATED_EVENT.pop(conversation_id, None)
+        history = _history_for(conversation_id)
+    else:
+        history = messages_to_history(bundle["messages"])
+        _HISTORY_CACHE[conversation_id] = (len(bundle["messages"]), history)
+
+    if not history:
+        welcome_text = (
+            "Hi! I’m your personal assistant. I can review your calendar, find meetings, "
+            "and help you schedule or update events. Just let me know what you need."
+        )
+        store.append_message(conversation_id, "assistant", welcome_text)
+        history = _history_for(conversation_id)
+
+    schedule_html = render_schedule(get_todays_events(events_future.result()))
+    tasks_html = render_tasks(tasks_future.result())
+    return history, "", conversation_id, schedule_html, tasks_html
+
+
+def start_new_conversation() -> Tuple[List[Message], str, str, str, str]:
+    return initialize_interface(reset=True)
+
+
+def clear_current_conversation(
+    conversation_id: Optional[str],
+) -> Tuple[List[Message], str, str, str, str]:
+    return initialize_interface(reset=True)
+
+
+def load_conversation(
+    conversation_id: Optional[str],
+) -> Tuple[List[Message], str, str, str, str]:
+    return initialize_interface()
+
+
+def _wants_bulk_delete(action: Optional[dict], user_message: Optional[str]) -> bool:
+    if user_message and _BULK_DELETE_RE.search(user_message):
+        return True
+    if action:
+        for key in ("title", "description", "new_title", "new_description"):
+            value = action.get(key)
+            if value and _BULK_DELETE_RE.search(str(value)):
+                return True
+    return False
+
+
+def _format_count(n: int, singular: str, plural: str) -> str:
+    return f"{n} {singular if n == 1 else plural}"
+
+
+# Raw events carry both API (startDate/startTime) and DB (date_of_meeting/
+# start_time/time) spellings of every field. The suggestion helpers resolve
+# each alias chain exactly once per event and then work with plain attribute
+# reads instead of repeated dict probing.
+_NormEvent = namedtuple(
+    "_NormEvent", "id title start_date start_time end_time start_min end_min"
+)
+
+
+def _normalize_event(event: dict) -> _NormEvent:
+    start_time = (
+        event.get("startTime") or event.get("start_time") or event.get("time") or ""
+    )
+    end_time = event.get("endTime") or event.get("end_time") or ""
+    return _NormEvent(
+        id=event.get("id"),
+        title=event.get("title") or "",
+        start_date=event.get("startDate") or event.get("date_of_meeting") or "",
+        start_time=start_time,
+        end_time=end_time,
+        # Parsed once here so loops over many events compare plain ints.
+        start_min=_time_to_minutes(start_time),
+        end_min=_time_to_minutes(end_time),
+    )
+
+
+def _format_event_option(event: _NormEvent) -> str:
+    title = event.title or "Untitled meeting"
+    descriptor = " ".join(value for value in [event.start_date, event.start_time] if value)
+    return f"{title} ({descriptor})" if descriptor else title
+
+
+def _build_delete_suggestion(events: List[dict]) -> str:
+    if not events:
+        return "⚠️ I didn’t find any meetings to remove."
+    top_events = heapq.nsmallest(
+        5,
+        (_normalize_event(event) for event in events),
+        key=lambda ev: (ev.start_date, ev.start_time),
+    )
+    lines = ["I’m not sure which meeting to delete. Here are some options:"]
+    for index, event in enumerate(top_events, start=1):
+        lines.append(f"{index}. {_format_event_option(event)}")
+    lines.append("Let me know the exact title, time, or date of the one you want removed.")
+    return "\n".join(lines)
+
+
+def _time_to_minutes(value: Optional[str]) -> Optional[int]:
+    # Fast path for canonical "HH:MM" (the overwhelmingly common shape in
+    # stored events): pure ord() arithmetic, no normalization or split.
+    if (
+        value is not None
+        and len(value) == 5
+        and value[2] == ":"
+        and value[:2].isdigit()
+        and value[3:].isdigit()
+    ):
+        minutes = (
+            (ord(value[0]) - 48) * 600
+            + (ord(value[1]) - 48) * 60
+            + (ord(value[3]) - 48) * 10
+            + (ord(value[4]) - 48)
+        )
+        if minutes < 24 * 60 and (ord(value[3]) - 48) < 6:
+            return minutes
+        return None
+    normalised = _normalise_time(value)
+    if not normalised:
+        return None
+    return _hhmm_to_minutes(normalised)
+
+
+_SLOT_QUANTUM = 15  # minutes per bit in the busy-day bitmap
+
+
+def _find_free_slots_for_date(events: List[dict], date_str: str, duration_minutes: int = 60) -> List[str]:
+    # Pack the day into one int bitmap, one bit per 15-minute quantum, so
+    # each candidate window is a single mask test instead of an overlap
+    # scan over every event on the day.
+    busy = 0
+    for event in events:
+        normalized = _normalize_event(event)
+        if normalized.start_date != date_str:
+            continue
+        start_minutes = normalized.start_min
+        if start_minutes is None:
+            continue
+        end_minutes = normalized.end_min
+        if end_minutes is None or end_minutes <= start_minutes:
+            end_minutes = start_minutes + duration_minutes
+        first_bit = start_minutes // _SLOT_QUANTUM
+        last_bit = -(-end_minutes // _SLOT_QUANTUM)  # ceil division
+        busy |= ((1 << (last_bit - first_bit)) - 1) << first_bit
+
+    return [
+        f"{start_minutes // 60:02d}:{start_minutes % 60:02d}"
+        for start_minutes in _free_slots_from_mask(busy, duration_minutes)
+    ]
+
+
+def _free_slots_from_mask(
+    busy: int,
+    duration_minutes: int,
+    work_start: int = 9 * 60,
+    work_end: int = 18 * 60,
+    limit: int = 5,
+) -> List[int]:
+    """Scan a busy-day bitmap and return up to ``limit`` free start minutes.
+
+    Pure integer arithmetic end to end — string formatting stays at the
+    caller — so bulk multi-day scans can reuse it directly on prebuilt
+    masks (and it would compile as-is should a JIT ever be worthwhile).
+    """
+    # A fully booked working window answers without sampling any candidates.
+    first_work_bit = work_start // _SLOT_QUANTUM
+    work_bits = work_end // _SLOT_QUANTUM - first_work_bit
+    work_mask = ((1 << work_bits) - 1) << first_work_bit
+    if busy & work_mask == work_mask:
+        return []
+
+    slots: List[int] = []
+    window = (1 << max(1, duration_minutes // _SLOT_QUANTUM)) - 1
+    for start_minutes in range(work_start, work_end - duration_minutes + 1, 30):
+        if not (busy & (window << (start_minutes // _SLOT_QUANTUM))):
+            slots.append(start_minutes)
+            if len(slots) >= limit:
+                break
+    return slots
+
+
+def _suggest_free_days(
+    events: List[dict],
+    lookahead: int = 7,
+    today: Optional[date] = None,
+) -> List[Tuple[str, int]]:
+    # Callers that already know "today" pass it in so one user turn reads
+    # the clock at most once.
+    if today is None:
+        today = date.today()
+    window = [
+        (today + timedelta(days=offset + 1)).isoformat() for offset in range(lookahead)
+    ]
+    window_set = frozenset(window)
+
+    # Count only dates inside the lookahead window; events elsewhere in the
+    # calendar can't influence the suggestions.
+    events_by_date: defaultdict[str, int] = defaultdict(int)
+    for event in events:
+        event_date = event.get("startDate") or event.get("date_of_meeting") or ""
+        if event_date in window_set:
+            events_by_date[event_date] += 1
+
+    candidates = [(day_str, events_by_date.get(day_str, 0)) for day_str in window]
+
+    free_days = [item for item in candidates if item[1] == 0]
+    if free_days:
+        return free_days[:5]
+
+    return heapq.nsmallest(5, candidates, key=lambda item: item[1])
+
+
+def _looks_like_reschedule(action: Optional[dict], user_message: Optional[str]) -> bool:
+    texts: List[str] = []
+    if user_message:
+        texts.append(user_message.lower())
+    if action:
+        for key in (
+            "description",
+            "title",
+            "new_description",
+            "new_title",
+            "meta",
+        ):
+            value = action.get(key)
+            if isinstance(value, str):
+                texts.append(value.lower())
+    combined = " ".join(texts)
+    return any(keyword in combined for keyword in _RESCHEDULE_KEYWORDS)
+
+
+def _extract_time_candidates(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    pattern = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b", re.IGNORECASE)
+    candidates: List[str] = []
+    for match in pattern.finditer(text):
+        hour = int(match.group(1))
+        minute = int(match.group(2) or "00")
+        meridiem = match.group(3).lower()
+        if hour == 12:
+            hour = 0
+        if meridiem == "pm":
+            hour += 12
+        candidates.append(f"{hour:02d}:{minute:02d}")
+    # also consider explicit HH:MM without am/pm
+    explicit_pattern = re.compile(r"\b(\d{1,2}):(\d{2})\b")
+    for match in explicit_pattern.finditer(text):
+        hour = int(match.group(1))
+        minute = int(match.group(2))
+        if 0 <= hour < 24:
+            candidates.append(f"{hour:02d}:{minute:02d}")
+    return candidates
+
+
+def _delete_calendar_event(event_id: Optional[str], conversation_id: Optional[str]) -> bool:
+    if not event_id:
+        return False
+    try:
+        resp = _SESSION.delete(f"{CALENDAR_API}/events/{event_id}", timeout=10)
+        if resp.status_code == 404:
+            return False
+        resp.raise_for_status()
+        _invalidate_fetch_cache("events")
+    except Exception as exc:
+        logger.warning("Failed to delete calendar event during reschedule heuristic: %s", exc)
+        return False
+
+    logger.info("Deleted calendar event id=%s for reschedule", event_id)
+    if conversation_id and _LATEST_CREATED_EVENT.get(conversation_id, {}).get("id") == event_id:
+        _LATEST_CREATED_EVENT.pop(conversation_id, None)
+    return True
+
+
+def _maybe_delete_reschedule_conflict(
+    events: List[dict],
+    title: str,
+    date_str: str,
+    new_start: str,
+    action: Optional[dict],
+    user_message: Optional[str],
+    conversation_id: Optional[str],
+) -> None:
+    if not events:
+        return
+
+    original_times: List[str] = []
+    original_times.extend(_extract_time_candidates(user_message))
+    if action:
+        for key in (
+            "original_start_time",
+            "previous_start_time",
+            "old_start_time",
+            "prior_start_time",
+        ):
+            original_times.append(_coerce_time_string(action.get(key)))
+        original_times.extend(_extract_time_candidates(action.get("description")))
+
+    original_set = {time for time in original_times if time}
+    target_title = title.strip().lower()
+    fallback: Optional[str] = None
+
+    for event in events:
+        event_id = event.get("id")
+        if not event_id:
+            continue
+        event_title = (event.get("title") or "").strip().lower()
+        if target_title and event_title and event_title != target_title:
+            continue
+        event_date = event.get("startDate") or event.get("date_of_meeting") or ""
+        if date_str and event_date != date_str:
+            continue
+        event_start = _coerce_time_string(
+            event.get("startTime") or event.get("start_time") or event.get("time")
+        )
+        if not event_start or event_start == new_start:
+            continue
+        if original_set and event_start in original_set:
+            if _delete_calendar_event(event_id, conversation_id):
+                return
+        if not fallback:
+            fallback = event_id
+
+    if fallback:
+        _delete_calendar_event(fallback, conversation_id)
+
+
+def build_app() -> gr.Blocks:
+    theme = gr.themes.Soft(primary_hue="blue", secondary_hue="slate", radius_size="lg")
+
+    with gr.Blocks(theme=theme, css_paths=[CSS_FILE, PANELS_CSS_FILE]) as demo:
+        conversation_state = gr.State()
+
+        # Tab system for Chat and Calendar views
+        with gr.Tabs() as tabs:
+            # Chat Tab
+            with gr.TabItem("Chat Assistant", id="chat_tab"):
+                with gr.Row(equal_height=True):
+                    with gr.Column(scale=1, min_width=240, elem_classes=["sidebar-column"]):
+                        magic_button = gr.Button("✨ Magic AI", elem_id="magic-ai-button")
+
+                    with gr.Column(scale=4):
+                        chatbot = gr.Chatbot(
+                            label="Chat",
+                            height="80vh",
+                            type="messages",
+                        )
+
+                        with gr.Row():
+                            message = gr.Textbox(
+                                show_label=False,
+                                placeholder="Send a message…",
+                                autofocus=True,
+                                lines=1,
+                                max_lines=3,
+                                scale=8,
+                            )
+                            clear_button = gr.Button("Clear", size="sm", variant="secondary", scale=1, min_width=60)
+                            send = gr.Button("➤", size="sm", scale=1, min_width=50)
+
+                    with gr.Column(scale=2, min_width=260):
+                        # Panels start empty — demo.load hydrates them, so
+                        # building the app never blocks on the calendar API.
+                        with gr.Accordion(
+                            "Today's Calendar", open=False, elem_classes=["panel-card"]
+                        ):
+                            schedule_panel = gr.HTML("")
+                        with gr.Accordion(
+                            "Tasks", open=False, elem_classes=["panel-card"]
+                        ):
+                            tasks_panel = gr.HTML("")
+            
+            # Calendar Tab
+            with gr.TabItem("Full Calendar", id="calendar_tab") as calendar_tab:
+                # Starts empty; the iframe (React bundle and all) is only
+                # injected when the user actually opens this tab.
+                calendar_iframe = gr.HTML("")
+
+        calendar_tab.select(
+            lambda: _CALENDAR_IFRAME_HTML,
+            inputs=None,
+            outputs=[calendar_iframe],
+            queue=False,
+        )
+
+        demo.load(
+            lambda: initialize_interface(reset=True),
+            inputs=None,
+            outputs=[
+                chatbot,
+                message,
+                conversation_state,
+                schedule_panel,
+                tasks_panel,
+            ],
+        )
+
+        # One endpoint for both triggers instead of two duplicate
+        # registrations with separate queue bookkeeping.
+        gr.on(
+            triggers=[message.submit, send.click],
+            fn=handle_user_message,
+            inputs=[message, chatbot, conversation_state],
+            outputs=[
+                chatbot,
+                message,
+                conversation_state,
+                schedule_panel,
+                tasks_panel,
+            ],
+            queue=True,
+            concurrency_limit=10,
+            concurrency_id="chat",
+        )
+
+        # The agent run streams progress banners; its own concurrency id
+        # caps simultaneous runs so clicks can't stampede the LLM provider.
+        magic_button.click(
+            run_agent_background,
+            inputs=[conversation_state],
+            outputs=[schedule_panel, tasks_panel],
+            queue=True,
+            concurrency_limit=2,
+            concurrency_id="agent",
+            show_progress="minimal",
+        )
+
+        clear_button.click(
+            clear_current_conversation,
+            inputs=[conversation_state],
+            outputs=[
+                chatbot,
+                message,
+                conversation_state,
+                schedule_panel,
+                tasks_panel,
+            ],
+            queue=False,
+        )
+
+        # Serve chat turns through the SSE-backed worker pool instead of
+        # serializing every user through one worker; navigation stays
+        # queue=False so it remains instant.
+        demo.queue(default_concurrency_limit=10, max_size=64)
+
+    return demo
+
+
+demo = build_app()
+
+
+if __name__ == "__main__":
+    demo.launch()
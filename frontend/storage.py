@@ -21,9 +21,22 @@ class ConversationStore:
         self._status = f"Using SQLite at {self._db_path}"
         self._init_schema()
         self._default_id = DEFAULT_CONVERSATION_ID
+        # Write revision counter; the cached first listing page stays valid
+        # until a write bumps it, since only this process touches the DB.
+        self._rev = 0
+        self._list_cache: Optional[List[Dict[str, Any]]] = None
+        self._list_cache_rev = -1
+        self._list_cache_limit = 0
+        self._ensured = False
         self._ensure_single_conversation()
 
+    def _invalidate_list_cache(self) -> None:
+        self._rev += 1
+
     def _init_schema(self) -> None:
+        # WAL lets readers proceed while a write is in flight, so panel
+        # fetches on worker threads don't serialize behind append_message.
+        self._conn.execute("PRAGMA journal_mode=WAL")
         with self._conn:
             self._conn.execute(
                 """
@@ -49,6 +62,10 @@ class ConversationStore:
             )
 
     def _ensure_single_conversation(self) -> None:
+        # The schema is append-only within a process, so once the default
+        # conversation is known to exist there is nothing left to enforce.
+        if self._ensured:
+            return
         with self._conn:
             rows = self._conn.execute(
                 "SELECT id FROM conversations"
@@ -77,6 +94,7 @@ class ConversationStore:
                     """,
                     (self._default_id, now, now),
                 )
+        self._ensured = True
 
     @property
     def status(self) -> str:
@@ -113,33 +131,109 @@ class ConversationStore:
                 "UPDATE conversations SET updated_at = ? WHERE id = ?",
                 (timestamp, conversation_id),
             )
+        self._invalidate_list_cache()
 
     def update_title_if_missing(self, conversation_id: str, candidate: str) -> None:
         # Titles are no longer used when only a single conversation is available.
         return
 
-    def list_conversations(self) -> List[Dict[str, Any]]:
+    def list_conversations(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return conversations newest-first, one page at a time.
+
+        ``cursor`` is the ``updated_at`` of the last row of the previous page;
+        pass it back to fetch the next page.
+        """
+        is_first_page = cursor is None
+        if (
+            is_first_page
+            and self._list_cache is not None
+            and self._list_cache_rev == self._rev
+            # Only serve from cache when it can cover the request: either it
+            # was populated with at least this limit, or the DB ran out of
+            # rows before the cached limit (so a bigger page looks the same).
+            and (
+                limit <= self._list_cache_limit
+                or len(self._list_cache) < self._list_cache_limit
+            )
+        ):
+            return self._list_cache[:limit]
+
         self._ensure_single_conversation()
-        row = self._conn.execute(
+        if cursor is None:
+            rows = self._conn.execute(
+                """
+                SELECT id, title, created_at, updated_at
+                FROM conversations
+                ORDER BY updated_at DESC
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        else:
+            rows = self._conn.execute(
+                """
+                SELECT id, title, created_at, updated_at
+                FROM conversations
+                WHERE updated_at < ?
+                ORDER BY updated_at DESC
+                LIMIT ?
+                """,
+                (cursor, limit),
+            ).fetchall()
+        conversations = [
+            {
+                "_id": row["id"],
+                "title": row["title"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+            }
+            for row in rows
+        ]
+        if is_first_page:
+            self._list_cache = conversations
+            self._list_cache_rev = self._rev
+            self._list_cache_limit = limit
+        return conversations
+
+    def fetch_conversation_summaries(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return sidebar-style rows (id, title, last message, updated_at).
+
+        One statement with a correlated subquery for the latest message,
+        instead of a per-conversation preview query (the N+1 pattern).
+        """
+        self._ensure_single_conversation()
+        rows = self._conn.execute(
             """
-            SELECT id, title, created_at, updated_at
-            FROM conversations
-            WHERE id = ?
+            SELECT c.id, c.title, c.updated_at,
+                   (SELECT content FROM messages m
+                    WHERE m.conversation_id = c.id
+                    ORDER BY m.id DESC LIMIT 1) AS last_message
+            FROM conversations c
+            ORDER BY c.updated_at DESC
+            LIMIT ?
             """,
-            (self._default_id,),
-        ).fetchone()
-        if not row:
-            return []
+            (limit,),
+        ).fetchall()
         return [
             {
                 "_id": row["id"],
                 "title": row["title"],
-                "created_at": row["created_at"],
+                "last_message": row["last_message"],
                 "updated_at": row["updated_at"],
             }
+            for row in rows
         ]
 
-    def fetch_messages(self, conversation_id: Optional[str]) -> List[Dict[str, Any]]:
+    def fetch_messages(
+        self,
+        conversation_id: Optional[str],
+        since: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Return messages in order, optionally skipping the first ``since``."""
         self._ensure_single_conversation()
         conversation_id = conversation_id or self._default_id
         rows = self._conn.execute(
@@ -148,8 +242,9 @@ class ConversationStore:
             FROM messages
             WHERE conversation_id = ?
             ORDER BY id ASC
+            LIMIT -1 OFFSET ?
             """,
-            (conversation_id,),
+            (conversation_id, since),
         ).fetchall()
         return [
             {
@@ -160,6 +255,40 @@ class ConversationStore:
             for row in rows
         ]
 
+    def fetch_conversation_bundle(
+        self,
+        conversation_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return the conversation row plus its messages in one round trip.
+
+        Interface-load paths previously issued separate calls for the
+        default id and the message list; this batches both queries.
+        """
+        self._ensure_single_conversation()
+        conversation_id = conversation_id or self._default_id
+        row = self._conn.execute(
+            """
+            SELECT id, title, created_at, updated_at
+            FROM conversations
+            WHERE id = ?
+            """,
+            (conversation_id,),
+        ).fetchone()
+        conversation = (
+            {
+                "_id": row["id"],
+                "title": row["title"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+            }
+            if row
+            else {"_id": conversation_id, "title": None}
+        )
+        return {
+            "conversation": conversation,
+            "messages": self.fetch_messages(conversation_id),
+        }
+
     def reset_conversation(self, conversation_id: Optional[str] = None) -> None:
         conversation_id = conversation_id or self._default_id
         self._ensure_single_conversation()
@@ -177,4 +306,5 @@ class ConversationStore:
                 """,
                 (timestamp, conversation_id),
             )
+        self._invalidate_list_cache()
 